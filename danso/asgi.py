@@ -13,4 +13,36 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "danso.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# django.setup() 이후에 import 해야 모델을 불러올 수 있다
+from realtime.background import RealtimeBackground  # noqa: E402
+from realtime.consumers import websocket_application  # noqa: E402
+from user.http_client import SharedHttpClient  # noqa: E402
+
+
+async def lifespan(scope, receive, send):
+    # Django ASGIHandler는 lifespan을 처리하지 않으므로 여기서 공유 자원을 열고 닫는다
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await SharedHttpClient.start()
+                await RealtimeBackground.start()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await RealtimeBackground.close()
+            await SharedHttpClient.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections
+
+T = TypeVar("T")
+
+# 트랜잭션이나 raw SQL처럼 비동기 ORM으로 표현할 수 없는 DB 작업 전용 스레드 풀.
+# 스레드마다 DB 연결을 하나씩 잡으므로 풀 크기가 곧 이 경로의 최대 연결 수다.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_THREAD_POOL_SIZE, thread_name_prefix="db"
+)
+
+
+def _run(func: Callable[..., T], *args, **kwargs) -> T:
+    # 요청 사이클 밖의 스레드이므로 끊겼거나 CONN_MAX_AGE가 지난 연결을 직접 정리
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_thread(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    동기 DB 함수를 전용 스레드 풀에서 실행
+
+    sync_to_async의 기본(thread_sensitive) 모드는 모든 호출을 한 스레드에 줄
+    세우지만, 이 풀에서는 DB_THREAD_POOL_SIZE개까지 동시에 실행된다.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(_run, func, *args, **kwargs))
@@ -0,0 +1,22 @@
+import asyncio
+import threading
+
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_local = threading.local()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    현재 이벤트 루프의 비동기 Redis 클라이언트
+
+    연결은 만든 이벤트 루프에서만 쓸 수 있으므로 루프가 바뀌면 새로 만든다.
+    uvicorn 워커는 루프 하나를 계속 쓰고, runserver처럼 요청마다 새 루프를
+    여는 경우에도 다른 루프의 연결을 쓰지 않는다.
+    """
+    loop = asyncio.get_running_loop()
+    if getattr(_local, "loop", None) is not loop:
+        _local.loop = loop
+        _local.client = aioredis.from_url(settings.REDIS_URL)
+    return _local.client
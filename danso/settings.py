@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 env = environ.Env()
 environ.Env.read_env(env_file=".env")
@@ -47,12 +48,14 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "psycopg2",
     "adrf",
     "corsheaders",
     "rest_framework",
     "user.apps.UserConfig",
     "sentence.apps.SentenceConfig",
+    "realtime.apps.RealtimeConfig",
 ]
 
 MIDDLEWARE = [
@@ -153,11 +156,36 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 GOOGLE_CLIENT_ID = env("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = env("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = env("GOOGLE_REDIRECT_URI")
+# 토큰 응답의 id_token을 캐시된 Google 공개키로 직접 검증해 userinfo 호출을 생략
+GOOGLE_ID_TOKEN_VERIFY_LOCALLY = env.bool(
+    "GOOGLE_ID_TOKEN_VERIFY_LOCALLY", default=False
+)
+
+# 로그인 코드 대신 DB 조회 없이 검증되는 서명 토큰을 발급
+LOGIN_TOKEN_ENABLED = env.bool("LOGIN_TOKEN_ENABLED", default=False)
+LOGIN_TOKEN_MAX_AGE = env.int("LOGIN_TOKEN_MAX_AGE", default=60 * 60 * 24 * 30)
+# 토큰 서명 키. SECRET_KEY는 저장소에 공개되어 있으므로 환경 변수로만 받는다
+LOGIN_TOKEN_SECRET = env("LOGIN_TOKEN_SECRET", default="")
+if LOGIN_TOKEN_ENABLED and not LOGIN_TOKEN_SECRET:
+    raise ImproperlyConfigured("LOGIN_TOKEN_ENABLED requires LOGIN_TOKEN_SECRET.")
+
+# 비동기 ORM으로 옮길 수 없는 DB 작업(트랜잭션, raw SQL)을 동시에 실행할 스레드 수
+DB_THREAD_POOL_SIZE = env.int("DB_THREAD_POOL_SIZE", default=8)
+
+REDIS_URL = env("REDIS_URL")
+
+# 상대방 하트비트가 이 시간(초) 이상 없으면 timeout 이벤트, 게임 종료까지의 시간(초)
+REALTIME_OPPONENT_TIMEOUT = env.int("REALTIME_OPPONENT_TIMEOUT", default=5)
+REALTIME_GAME_TIMEOUT = env.int("REALTIME_GAME_TIMEOUT", default=20)
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # 기본 메모리 캐시
-        "LOCATION": "unique-snowflake",  # 식별자
+        # 실시간 방 상태를 여러 워커가 공유하도록 Redis 사용
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
     }
 }
 
@@ -8,6 +8,7 @@ from sentence.views import (
     get_sentence_game,
     search_sentence_pack,
     get_sentence_packs_random,
+    export_sentence_packs,
     update_sentence_game_point, interact_like_sentence_pack,
 )
 from user.views import (
@@ -20,10 +21,12 @@ from user.views import (
 from realtime.views import (
     match_player,
     check_match_status,
+    match_status_stream,
     in_game_heartbeat,
     join_room,
     missed_word,
     leave_room,
+    room_code_occupancy,
 )
 
 urlpatterns = [
@@ -38,9 +41,14 @@ urlpatterns = [
     ),
     path("sentences/random", get_sentence_packs_random, name="random-sentences"),
     path("sentences/search", search_sentence_pack, name="search-sentence-pack"),
+    path("sentences/export", export_sentence_packs, name="export-sentence-packs"),
     path("sentences/<int:sentence_id>", get_sentence_by_id, name="sentence-detail"),
     path("sentences/<int:sentence_id>/game", get_sentence_game, name="sentence-game"),
-    path("sentences/{int:sentence_pack_id}/interact-like", interact_like_sentence_pack, name="sentence-interact-like"),
+    path(
+        "sentences/<int:sentence_id>/interact-like",
+        interact_like_sentence_pack,
+        name="sentence-interact-like",
+    ),
     path("login/oauth/", login_oauth_url, name="login-oauth-url"),
     path("login/callback", login_oauth_callback, name="login-oauth-callback"),
     path("login/result", login_view_render, name="login-result"),
@@ -48,6 +56,11 @@ urlpatterns = [
     path("user/logout", user_logout, name="user-logout"),
     path("realtime/match/player", match_player, name="match-player"),
     path("realtime/match/status", check_match_status, name="match-status"),
+    path(
+        "realtime/match/status/stream",
+        match_status_stream,
+        name="match-status-stream",
+    ),
     path("realtime/match/join", join_room, name="join-match"),
     path(
         "realtime/game/<str:room_id>/heartbeat",
@@ -56,4 +69,9 @@ urlpatterns = [
     ),
     path("realtime/game/<str:room_id>/missed", missed_word, name="realtime-game-join"),
     path("realtime/game/<str:room_id>/leave", leave_room, name="realtime-game-leave"),
+    path(
+        "realtime/metrics/room-codes",
+        room_code_occupancy,
+        name="realtime-room-code-occupancy",
+    ),
 ]
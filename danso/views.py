@@ -1,7 +1,14 @@
-from django.shortcuts import render
+import hashlib
+import json
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.http import HttpResponse
+from django.template.loader import render_to_string
 from django.urls import get_resolver
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework.decorators import api_view
-from rest_framework.response import Response
 
 
 def get_all_urls(url_patterns, base="", urls=None):
@@ -38,11 +45,7 @@ def get_all_urls(url_patterns, base="", urls=None):
     return urls
 
 
-def api_docs(request):
-    """API 문서 페이지를 렌더링합니다."""
-    resolver = get_resolver()
-    all_urls = get_all_urls(resolver.url_patterns)
-
+def group_urls(all_urls):
     # URL들을 그룹화
     grouped_urls = {
         "sentences": {},
@@ -61,20 +64,64 @@ def api_docs(request):
         else:
             grouped_urls["other"][url] = desc
 
-    return render(request, "api_docs.html", {"api_docs": grouped_urls})
+    return grouped_urls
 
 
-@api_view(["GET"])
-def api_root(request):
-    """API 루트 페이지를 반환합니다."""
-    resolver = get_resolver()
+class ApiIndex(NamedTuple):
+    html: bytes
+    html_etag: str
+    json: bytes
+    json_etag: str
+
+
+def body_etag(body: bytes) -> str:
+    return quote_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+@lru_cache(maxsize=1)
+def build_api_index(resolver) -> ApiIndex:
+    """URL 목록을 한 번만 훑어서 문서 HTML과 JSON 응답 본문을 미리 만든다"""
     all_urls = get_all_urls(resolver.url_patterns)
 
-    return Response(
+    html = render_to_string("api_docs.html", {"api_docs": group_urls(all_urls)})
+    html = html.encode("utf-8")
+    body = json.dumps(
         {
             "version": "1.0.0",
             "title": "Danso API",
             "description": "단소 게임 서버 API",
             "endpoints": all_urls,
-        }
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return ApiIndex(html, body_etag(html), body, body_etag(body))
+
+
+def get_api_index() -> ApiIndex:
+    # URLconf가 다시 로드되면(clear_url_caches) get_resolver()가 새 객체를
+    # 돌려주므로 그때만 새로 만든다
+    return build_api_index(get_resolver())
+
+
+def cached_response(request, body: bytes, etag: str, content_type: str):
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    return response
+
+
+def api_docs(request):
+    """API 문서 페이지를 렌더링합니다."""
+    index = get_api_index()
+    return cached_response(
+        request, index.html, index.html_etag, "text/html; charset=utf-8"
     )
+
+
+@api_view(["GET"])
+def api_root(request):
+    """API 루트 페이지를 반환합니다."""
+    index = get_api_index()
+    return cached_response(request, index.json, index.json_etag, "application/json")
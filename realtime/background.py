@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import ClassVar
+
+from .manager import RealtimeRoomManager
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeBackground:
+    """
+    워커가 떠 있는 동안 도는 실시간 방 관리 작업
+
+    ASGI lifespan 시작 시 start, 종료 시 close를 호출한다. 모든 작업은
+    Redis 스크립트로 원자적으로 처리되므로 여러 워커에서 함께 돌아도 된다.
+
+    - 만료된 대기방 정리, 사라진 방의 코드 반납 (REAP_INTERVAL마다)
+    - 하트비트 타이머 휠 구동 (tick마다)
+    """
+
+    REAP_INTERVAL: ClassVar[float] = 30.0
+
+    _tasks: ClassVar[list[asyncio.Task]] = []
+
+    @staticmethod
+    async def _reap_expired() -> None:
+        reaped = await RealtimeRoomManager.reap_waiting_rooms()
+        if reaped:
+            logger.info("reaped %d expired waiting rooms", reaped)
+        released = await RealtimeRoomManager.reap_room_codes()
+        occupancy = await RealtimeRoomManager.room_code_occupancy()
+        logger.info(
+            "room codes: released=%d allocated=%d occupancy=%.4f",
+            released,
+            occupancy["allocated"],
+            occupancy["occupancy"],
+        )
+
+    @classmethod
+    async def _reap_expired_loop(cls) -> None:
+        while True:
+            try:
+                await cls._reap_expired()
+            except Exception:
+                logger.exception("failed to reap expired rooms")
+            await asyncio.sleep(cls.REAP_INTERVAL)
+
+    @classmethod
+    async def _expire_heartbeats(cls) -> None:
+        timers = RealtimeRoomManager.heartbeat_timers
+        while True:
+            # 바퀴를 돌리는 것은 메모리 연산이므로 만료된 타이머가 있을 때만 Redis를 부른다
+            expired = timers.advance()
+            if expired:
+                try:
+                    await RealtimeRoomManager.fire_heartbeat_timers(expired)
+                except Exception:
+                    logger.exception("failed to fire heartbeat timers")
+            await asyncio.sleep(timers.tick)
+
+    @classmethod
+    async def start(cls) -> None:
+        if cls._tasks:
+            return
+        RealtimeRoomManager.heartbeat_timers_running = True
+        cls._tasks = [
+            asyncio.create_task(cls._reap_expired_loop()),
+            asyncio.create_task(cls._expire_heartbeats()),
+        ]
+
+    @classmethod
+    async def close(cls) -> None:
+        for task in cls._tasks:
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        cls._tasks = []
+        RealtimeRoomManager.heartbeat_timers_running = False
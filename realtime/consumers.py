@@ -0,0 +1,197 @@
+import asyncio
+import json
+import re
+from typing import Optional
+from urllib.parse import parse_qs
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from danso.redis_client import get_async_redis
+from user.auth import login_code_to_user
+from .manager import RealtimeRoomManager
+from .store import RoomStore
+
+GAME_SOCKET_PATH = re.compile(r"^/realtime/game/(?P<room_id>[^/]+)/ws$")
+
+# 웹소켓 종료 코드
+CLOSE_BAD_REQUEST = 4400
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+room_manager = RealtimeRoomManager()
+
+
+class GameSocket:
+    """
+    게임 한 판 동안 유지되는 웹소켓 연결
+
+    클라이언트는 진행 상황을 보내고, 서버는 같은 방의 pub/sub 채널을 구독해
+    상대방의 진행 상황과 이벤트(damaged, left, game_ended)를 바로 밀어준다.
+
+    클라이언트 -> 서버:
+        {"type": "progress", "now_text": str, "position": int, "heart": int}
+        {"type": "missed"}
+    서버 -> 클라이언트:
+        {"type": "opponent", "now_text", "position", "heart", "completion_percentage"}
+        {"type": "event", "event": str}
+    """
+
+    def __init__(self, scope, receive, send, room_id: str):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.room_id = room_id
+        self.user_id: Optional[str] = None
+
+    def get_login_code(self) -> Optional[str]:
+        # 브라우저 웹소켓은 헤더를 지정할 수 없으므로 쿼리스트링도 허용
+        query = parse_qs(self.scope.get("query_string", b"").decode("utf-8"))
+        if "login_code" in query:
+            return query["login_code"][0]
+        for name, value in self.scope.get("headers", []):
+            if name == b"x-login-code":
+                return value.decode("utf-8")
+        return None
+
+    async def send_json(self, data: dict):
+        await self.send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def close(self, code: int = 1000):
+        await self.send({"type": "websocket.close", "code": code})
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        await self.send({"type": "websocket.accept"})
+
+        login_code = self.get_login_code()
+        if not login_code:
+            return await self.close(CLOSE_BAD_REQUEST)
+
+        try:
+            user = await login_code_to_user(login_code)
+        except AuthenticationFailed:
+            return await self.close(CLOSE_UNAUTHORIZED)
+        self.user_id = str(user.id)
+
+        room = await room_manager.get_room(self.room_id)
+        if not room:
+            return await self.close(CLOSE_NOT_FOUND)
+        if self.user_id not in room["players"]:
+            return await self.close(CLOSE_FORBIDDEN)
+
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(RoomStore.channel(self.room_id))
+        try:
+            # 구독 전에 갱신된 상대방 상태를 놓치지 않도록 현재 상태를 먼저 보낸다
+            for player_id, status in room["player_status"].items():
+                if player_id != self.user_id and "now_text" in status:
+                    await self.send_opponent(status)
+
+            tasks = {
+                asyncio.create_task(self.read_client()),
+                asyncio.create_task(self.push_updates(pubsub)),
+            }
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def read_client(self):
+        while True:
+            message = await self.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message["type"] != "websocket.receive":
+                continue
+
+            try:
+                data = json.loads(message.get("text") or message.get("bytes") or "")
+            except ValueError:
+                continue
+
+            if data.get("type") == "progress":
+                if not await self.handle_progress(data):
+                    return
+            elif data.get("type") == "missed":
+                # 하트 감소 후 상대방에게 damaged 이벤트 전달
+                if await room_manager.missed_word(self.room_id, self.user_id):
+                    await room_manager.add_event(self.room_id, self.user_id, "damaged")
+
+    async def handle_progress(self, data: dict) -> bool:
+        try:
+            position = int(data.get("position", 0))
+            heart = int(data.get("heart", 5))
+        except (TypeError, ValueError):
+            return True
+
+        # 상대방 상태는 pub/sub으로 받는다. 하트비트가 내 이벤트 큐를 비우므로
+        # 알림보다 먼저 꺼낸 이벤트는 여기서 전달한다
+        heartbeat = await room_manager.heartbeat(
+            self.room_id, self.user_id, data.get("now_text", ""), position, heart
+        )
+        if heartbeat["result"] == "ok":
+            for event in heartbeat["events"]:
+                await self.send_json({"type": "event", "event": event})
+            return True
+
+        if heartbeat["result"] == "ended":
+            await self.send_json({"type": "event", "event": "game_ended"})
+            await self.close()
+        elif heartbeat["result"] == "forbidden":
+            await self.close(CLOSE_FORBIDDEN)
+        else:
+            await self.close(CLOSE_NOT_FOUND)
+        return False
+
+    async def push_updates(self, pubsub):
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+
+            update = json.loads(message["data"])
+            if update.get("from") == self.user_id:
+                continue
+
+            if update["type"] == "status":
+                await self.send_opponent(update["status"])
+            elif update["type"] == "event":
+                # HTTP 하트비트로 같은 이벤트를 다시 받지 않도록 큐를 비운다.
+                # 큐가 비어 있으면 handle_progress의 하트비트가 먼저 꺼내 전달한 것이다.
+                # game_ended는 방과 함께 큐가 지워지므로 알림에 담긴 것을 전달
+                events = await room_manager.get_and_clear_events(
+                    self.room_id, self.user_id
+                )
+                if update["event"] == "game_ended":
+                    events.append("game_ended")
+                for event in events:
+                    await self.send_json({"type": "event", "event": event})
+                if "game_ended" in events:
+                    await self.close()
+                    return
+
+    async def send_opponent(self, status: dict):
+        await self.send_json(
+            {
+                "type": "opponent",
+                "now_text": status.get("now_text", ""),
+                "position": status.get("position", 0),
+                "heart": status.get("heart", 5),
+                "completion_percentage": status.get("completion_percentage", 0),
+            }
+        )
+
+
+async def websocket_application(scope, receive, send):
+    match = GAME_SOCKET_PATH.match(scope["path"])
+    if not match:
+        # 핸드셰이크를 받지 않고 닫으면 서버가 403으로 거절한다
+        await receive()
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+
+    await GameSocket(scope, receive, send, match.group("room_id")).run()
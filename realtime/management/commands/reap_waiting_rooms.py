@@ -0,0 +1,27 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from realtime.manager import RealtimeRoomManager
+
+
+class Command(BaseCommand):
+    help = (
+        "만료된 대기방을 랜덤 매칭 대기열에서 정리하고 사라진 방의 코드를 반납합니다."
+    )
+
+    @staticmethod
+    async def reap() -> tuple[int, int, dict]:
+        reaped = await RealtimeRoomManager.reap_waiting_rooms()
+        released = await RealtimeRoomManager.reap_room_codes()
+        occupancy = await RealtimeRoomManager.room_code_occupancy()
+        return reaped, released, occupancy
+
+    def handle(self, *args, **options):
+        reaped, released, occupancy = asyncio.run(self.reap())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"대기방 {reaped}개를 정리하고 방 코드 {released}개를 반납했습니다. "
+                f"(사용 중 {occupancy['allocated']}/{occupancy['capacity']})"
+            )
+        )
@@ -1,198 +1,111 @@
 import time
-import uuid, random
-from django.core.cache import cache
+import uuid
+
+from django.conf import settings
+
+from .matchmaking import MatchQueue
+from .room_codes import RoomCodeAllocator
+from .store import RoomStore
+from .timer_wheel import TimerWheel
 
 
 class RealtimeRoomManager:
-    WAITING_ROOM_KEY = "waiting_rooms"
-
-    @staticmethod
-    def generate_room_code() -> str:
-        while True:
-            code = str(random.randint(100000, 999999))
-            if not cache.get(f"room:{code}"):
-                return str(code)
-
-    def join_random_room(self, user_id: str):
-        waiting_rooms = cache.get(self.WAITING_ROOM_KEY, [])
-
-        # 먼저 유저가 이미 어떤 방에 있는지 확인
-        for room_id in waiting_rooms:
-            room = cache.get(f"room:{room_id}")
-            if room and user_id in room["players"]:
-                # 이미 방에 있다면 같은 상태를 반환
-                if "player_status" not in room:
-                    room["player_status"] = {}
-                if user_id not in room["player_status"]:
-                    room["player_status"][user_id] = {"heart": 5}
-                    cache.set(f"room:{room_id}", room, timeout=3600)
-                return {
-                    "room_id": room_id,
-                    "status": "matched" if len(room["players"]) >= 2 else "waiting",
-                    "players": room["players"],
-                }
-
-        # 호스트인 방이 있는지 확인
-        for room_id in waiting_rooms:
-            room = cache.get(f"room:{room_id}")
-            if room and len(room["players"]) == 1 and room["players"][0] == user_id:
-                # 내가 호스트인 방이 있다면 그 방의 상태를 반환
-                return {
-                    "room_id": room_id,
-                    "status": "waiting",
-                    "players": room["players"],
-                }
-
-        # 대기 중인 방 중에서 매칭 가능한 방 찾기
-        for i, room_id in enumerate(waiting_rooms):
-            room = cache.get(f"room:{room_id}")
-            if room and len(room["players"]) == 1 and user_id not in room["players"]:
-                # 적합한 방을 찾았을 때
-                waiting_rooms.pop(i)
-                room["players"].append(user_id)
-                cache.set(f"room:{room_id}", room, timeout=3600)
-                cache.set(self.WAITING_ROOM_KEY, waiting_rooms)
-                return {
-                    "room_id": room_id,
-                    "status": "matched",
-                    "players": room["players"],
-                }
-
-        # 적합한 방을 찾지 못했고 호스트인 방도 없을 경우에만 새로운 방 생성
-        room_id = self.generate_room_code()
-        room_data = {"players": [user_id], "type": "waiting"}
-        cache.set(f"room:{room_id}", room_data, timeout=600)
-        waiting_rooms.append(room_id)
-        cache.set(self.WAITING_ROOM_KEY, waiting_rooms)
-        return {"room_id": room_id, "status": "waiting", "players": [user_id]}
-
-    @staticmethod
-    def leave_room(room_id: str, user_id: str):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if not room:
+    WAITING_ROOM_TTL = 600
+    # 상대방 하트비트가 이 시간(초) 이상 없으면 timeout 이벤트
+    OPPONENT_TIMEOUT = settings.REALTIME_OPPONENT_TIMEOUT
+    # 하트비트가 이 시간(초) 이상 없는 플레이어가 있으면 게임 종료
+    GAME_TIMEOUT = settings.REALTIME_GAME_TIMEOUT
+    HEARTBEAT_TIMER_TICK = 0.25
+
+    store = RoomStore()
+    match_queue = MatchQueue()
+    room_codes = RoomCodeAllocator()
+    # 하트비트마다 플레이어별 마감 시각을 예약해 두고, 요청이 없어도
+    # 마감이 지나면 timeout / game_ended 이벤트를 발생시킨다
+    heartbeat_timers = TimerWheel(tick=HEARTBEAT_TIMER_TICK)
+    # 타이머 휠은 ASGI lifespan의 RealtimeBackground가 돌린다. 돌지 않는 동안에는
+    # 예약하지 않고 하트비트 요청 시의 타임아웃 확인만 사용한다
+    heartbeat_timers_running = False
+
+    async def join_random_room(self, user_id: str):
+        # 대기열에서 내 대기방 확인, 상대 방 꺼내기, 새 방 생성을 한 번에 처리.
+        # 방 코드는 새 대기방을 만들 때만 같은 스크립트 안에서 할당한다
+        return await self.match_queue.match(
+            user_id,
+            self.room_codes,
+            waiting_timeout=self.WAITING_ROOM_TTL,
+            room_timeout=self.store.ROOM_TTL,
+        )
+
+    @classmethod
+    async def leave_room(cls, room_id: str, user_id: str):
+        remaining = await cls.store.leave(room_id, user_id)
+        if remaining < 0:
             return False
 
-        if user_id in room["players"]:
-            room["players"].remove(user_id)
-
-            # 방에 아무도 없으면 방 삭제
-            if not room["players"]:
-                cache.delete(key)
-                # 대기방 목록에서도 제거
-                waiting_rooms = cache.get(RealtimeRoomManager.WAITING_ROOM_KEY, [])
-                if room_id in waiting_rooms:
-                    waiting_rooms.remove(room_id)
-                    cache.set(RealtimeRoomManager.WAITING_ROOM_KEY, waiting_rooms)
-            else:
-                cache.set(key, room, timeout=3600)
-            return True
-        return False
-
-    @staticmethod
-    def join_specific_room(room_id: str, user_id: str):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-
-        if not room:
-            room = {
-                "players": [user_id],
-                "type": "custom",
-                "player_status": {user_id: {"heart": 5}},
-            }
-            cache.set(key, room, timeout=3600)
-            return {"room_id": room_id, "status": "waiting", "players": [user_id]}
-
-        if "player_status" not in room:
-            room["player_status"] = {}
-        room["player_status"][user_id] = {"heart": 5}
-        room["players"].append(user_id)
-        cache.set(key, room, timeout=3600)
+        # 방에 아무도 없으면 방이 삭제되므로 대기열에서도 제거하고 코드 반납
+        if remaining == 0:
+            await cls.match_queue.remove(room_id)
+            await cls.room_codes.release(room_id)
+        return True
+
+    @classmethod
+    async def join_specific_room(cls, room_id: str, user_id: str):
+        # 방이 없으면 custom 방을 새로 만든다
+        players = await cls.store.join(
+            room_id, user_id, status={"heart": 5}, create_type="custom"
+        )
+        if len(players) >= 2:
+            # 랜덤 매칭 대기방에 직접 들어온 경우 더 이상 매칭 대상이 아니다
+            await cls.match_queue.remove(room_id)
+            await cls.store.publish(room_id, {"type": "joined", "from": user_id})
+        else:
+            # 유저가 정한 코드로 만든 방이 할당기에서 다시 나가지 않도록 표시
+            await cls.room_codes.claim(room_id, cls.store.ROOM_TTL)
 
         return {
             "room_id": room_id,
-            "status": "matched" if len(room["players"]) >= 2 else "waiting",
-            "players": room["players"],
+            "status": "matched" if len(players) >= 2 else "waiting",
+            "players": players,
         }
 
-    @staticmethod
-    def end_game(room_id: str):
-        key = f"room:{room_id}"
-        cache.delete(key)
-        return {"room_id": room_id, "status": "ended"}
-
-    @staticmethod
-    def get_room(room_id: str):
-        return cache.get(f"room:{room_id}")
-
-    @staticmethod
-    def set_room_game(room_id: str, game_data: dict):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if room:
-            room["game"] = game_data
-            cache.set(key, room, timeout=3600)
-            return True
-        return False
-
-    @staticmethod
-    def get_room_game(room_id: str):
-        room = cache.get(f"room:{room_id}")
-        return room.get("game") if room else None
-
-    @staticmethod
-    def update_user_game_status(
-        room_id: str, user_id: str, now_text: str, position: int, heart: int
-    ):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if not room:
-            return False
+    @classmethod
+    async def reap_waiting_rooms(cls) -> int:
+        """만료된 대기방을 랜덤 매칭 대기열에서 정리하고 정리한 수를 반환"""
+        return await cls.match_queue.reap()
 
-        current_time = time.time()
+    @classmethod
+    async def reap_room_codes(cls) -> int:
+        """TTL로 사라진 방의 코드를 반납하고 반납한 수를 반환"""
+        return await cls.room_codes.reap(default_lease=cls.store.ROOM_TTL)
 
-        if "player_status" not in room:
-            room["player_status"] = {}
+    @classmethod
+    async def room_code_occupancy(cls) -> dict:
+        return await cls.room_codes.occupancy()
 
-        # 진행률 계산
-        total_sentences = len(room["game"]["sentences"])
-        completion_percentage = (position / total_sentences) * 100
+    @classmethod
+    async def get_room(cls, room_id: str):
+        return await cls.store.get(room_id)
 
-        room["player_status"][user_id] = {
-            "now_text": now_text,
-            "position": position,
-            "heart": heart,
-            "completion_percentage": completion_percentage,
-            "last_heartbeat": current_time,
-        }
+    @classmethod
+    async def init_room_game(cls, room_id: str, game_data: dict):
+        return await cls.store.init_game(room_id, game_data)
 
-        cache.set(key, room, timeout=3600)
-        return True
+    @classmethod
+    async def get_room_game(cls, room_id: str):
+        return await cls.store.get_field(room_id, "game")
 
-    @staticmethod
-    def get_opponent_status(room_id: str, user_id: str):
-        room = cache.get(f"room:{room_id}")
-        if not room or "player_status" not in room:
-            return None
+    @classmethod
+    def build_opponent_status(
+        cls, players: list[str], opponent_status: dict | None, current_time: float
+    ):
+        if not opponent_status or "last_heartbeat" not in opponent_status:
+            return {"event": "timeout"}
 
-        current_time = time.time()
         events = []
 
-        opponent_id = None
-        for player_id in room["players"]:
-            if player_id != user_id:
-                opponent_id = player_id
-                break
-
-        if not opponent_id:
-            return None
-
-        opponent_status = room["player_status"].get(opponent_id)
-        if not opponent_status:
-            return {"event": "timeout"}
-
         # 하트비트 체크 (5초)
-        if current_time - opponent_status["last_heartbeat"] > 5:
+        if current_time - opponent_status["last_heartbeat"] > cls.OPPONENT_TIMEOUT:
             events.append("timeout")
 
         # 하트 변화 체크
@@ -200,7 +113,7 @@ class RealtimeRoomManager:
             events.append("damaged")
 
         # 플레이어 수 체크
-        if len(room["players"]) < 2:
+        if len(players) < 2:
             events.append("left")
 
         response = {
@@ -213,61 +126,106 @@ class RealtimeRoomManager:
 
         return response
 
-    @staticmethod
-    def add_event(room_id: str, user_id: str, event_type: str):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if not room:
-            return False
+    @classmethod
+    async def heartbeat(
+        cls, room_id: str, user_id: str, now_text: str, position: int, heart: int
+    ):
+        """
+        타임아웃 확인, 내 상태 기록, 상대방 상태 조회, 내 이벤트 비우기를
+        저장소 왕복 한 번으로 처리한다.
+
+        Returns:
+            {"result", "players", "opponent_status", "events"} 형태의 dict.
+            result는 "not_found", "forbidden", "ended", "ok" 중 하나이며,
+            events는 이번 하트비트로 큐에서 꺼낸 내 이벤트 목록
+        """
+        current_time = time.time()
+        result = await cls.store.heartbeat(
+            room_id,
+            user_id,
+            now_text,
+            position,
+            heart,
+            now=current_time,
+            game_timeout=cls.GAME_TIMEOUT,
+        )
+        if result["result"] == "ended":
+            await cls.room_codes.release(room_id)
+        if result["result"] != "ok":
+            return result
+        cls.schedule_heartbeat_timers(room_id, user_id, current_time)
+
+        opponent_status = None
+        if result["opponent_id"]:
+            opponent_status = cls.build_opponent_status(
+                result["players"], result["opponent_status"], current_time
+            )
+
+        if opponent_status:
+            # 쌓여 있던 이벤트는 모두 전달하고, event에는 가장 먼저 쌓인 것을 둔다
+            opponent_status["events"] = result["events"]
+            if result["events"]:
+                opponent_status["event"] = result["events"][0]
 
-        if "events" not in room:
-            room["events"] = {}
+        return {
+            "result": "ok",
+            "players": result["players"],
+            "opponent_status": opponent_status,
+            "events": result["events"],
+        }
 
-        # 각 유저별 이벤트 저장
-        for player_id in room["players"]:
-            if player_id != user_id:  # 이벤트를 상대방에게만 전달
-                if player_id not in room["events"]:
-                    room["events"][player_id] = []
-                room["events"][player_id].append(event_type)
+    @classmethod
+    def schedule_heartbeat_timers(
+        cls, room_id: str, user_id: str, last_heartbeat: float
+    ) -> None:
+        if not cls.heartbeat_timers_running:
+            return
+        # 같은 플레이어의 이전 마감은 새 하트비트로 대체된다
+        cls.heartbeat_timers.schedule(
+            (room_id, user_id, "timeout"), cls.OPPONENT_TIMEOUT, last_heartbeat
+        )
+        cls.heartbeat_timers.schedule(
+            (room_id, user_id, "game_ended"), cls.GAME_TIMEOUT, last_heartbeat
+        )
+
+    @classmethod
+    async def fire_heartbeat_timers(cls, expired: list[tuple[tuple, float]]) -> int:
+        """
+        마감이 지난 하트비트 타이머 처리
+
+        다른 워커가 그 뒤에 하트비트를 받았다면 저장소에서 확인 후 건너뛴다.
+
+        Args:
+            expired: heartbeat_timers.advance()가 돌려준 타이머 목록
+
+        Returns:
+            발생시킨 이벤트 수
+        """
+        fired = 0
+        for (room_id, user_id, event), last_heartbeat in expired:
+            if await cls.store.heartbeat_expired(
+                room_id, user_id, last_heartbeat, event
+            ):
+                fired += 1
+                if event == "game_ended":
+                    await cls.room_codes.release(room_id)
+        return fired
+
+    @classmethod
+    async def add_event(cls, room_id: str, user_id: str, event_type: str):
+        # 이벤트를 상대방에게만 전달
+        if not await cls.store.push_event(room_id, user_id, event_type):
+            return False
 
-        cache.set(key, room, timeout=3600)
+        await cls.store.publish(
+            room_id, {"type": "event", "from": user_id, "event": event_type}
+        )
         return True
 
-    @staticmethod
-    def get_and_clear_events(room_id: str, user_id: str):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if not room or "events" not in room:
-            return []
-
-        events = room["events"].get(user_id, [])
-        if user_id in room["events"]:
-            room["events"][user_id] = []  # 이벤트 클리어
-            cache.set(key, room, timeout=3600)
-        return events
-
-    @staticmethod
-    def missed_word(room_id: str, user_id: str):
-        key = f"room:{room_id}"
-        room = cache.get(key)
-        if not room or "player_status" not in room:
-            return False
-
-        player_status = room["player_status"].get(user_id)
-        if player_status:
-            player_status["heart"] = max(0, player_status["heart"] - 1)
-            cache.set(key, room, timeout=3600)
-            return True
-        return False
-
-    @staticmethod
-    def check_game_timeout(room_id: str):
-        room = cache.get(f"room:{room_id}")
-        if not room or "player_status" not in room:
-            return False
+    @classmethod
+    async def get_and_clear_events(cls, room_id: str, user_id: str):
+        return await cls.store.drain_events(room_id, user_id)
 
-        current_time = time.time()
-        for player_id, status in room["player_status"].items():
-            if current_time - status["last_heartbeat"] > 20:  # 20초 타임아웃
-                return True
-        return False
+    @classmethod
+    async def missed_word(cls, room_id: str, user_id: str):
+        return await cls.store.damage(room_id, user_id)
@@ -0,0 +1,229 @@
+import json
+import time
+from typing import ClassVar, Optional
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+from danso.redis_client import get_async_redis
+
+from .room_codes import ALLOCATE_CODE, RoomCodeAllocator
+from .store import RoomStore
+
+# KEYS[1] = 대기방 큐 (만료 시각을 점수로 하는 sorted set)
+# KEYS[2] = 유저 -> 대기방 인덱스, KEYS[3] = 대기방 -> 호스트 인덱스
+# KEYS[4..6] = 방 코드 할당기 키 (MATCH_SCRIPT만 사용)
+# 대기방 TTL이 모두 같으므로 만료 시각 순서가 곧 생성 순서(FIFO)다.
+REMOVE_ROOM = """
+local function remove_room(room_id)
+    redis.call('ZREM', KEYS[1], room_id)
+    local host = redis.call('HGET', KEYS[3], room_id)
+    if host then
+        redis.call('HDEL', KEYS[3], room_id)
+        if redis.call('HGET', KEYS[2], host) == room_id then
+            redis.call('HDEL', KEYS[2], host)
+        end
+    end
+end
+"""
+
+# ARGV = user_id, 방 키 prefix, 코드 탐색 시작 바이트, 대기방 TTL, 매칭된 방 TTL,
+#        방 pub/sub 채널 suffix, 현재 시각, 코드 수, MIN_CODE
+#
+# 1. 이미 호스트로 기다리는 방이 있으면 그 방을 그대로 돌려준다.
+# 2. 큐 맨 앞에서 방을 꺼내 매칭한다. 만료되었거나 호스트가 떠난 방은
+#    꺼내면서 버리므로 한 번씩만 비용을 치른다.
+# 3. 매칭할 방이 없을 때만 방 코드를 할당해 새 대기방을 만들고 큐 뒤에 넣는다.
+#    남은 코드가 없으면 false를 반환한다.
+MATCH_SCRIPT = REMOVE_ROOM + ALLOCATE_CODE + """
+local user_id = ARGV[1]
+local prefix = ARGV[2]
+
+local hosting = redis.call('HGET', KEYS[2], user_id)
+if hosting then
+    local players = redis.call('HGET', prefix .. hosting, 'players')
+    if players then
+        return {hosting, 'waiting', players}
+    end
+    remove_room(hosting)
+    redis.call('HDEL', KEYS[2], user_id)
+end
+
+while true do
+    local head = redis.call('ZPOPMIN', KEYS[1])
+    local room_id = head[1]
+    if not room_id then
+        break
+    end
+    remove_room(room_id)
+    local room_key = prefix .. room_id
+    local raw = redis.call('HGET', room_key, 'players')
+    if raw then
+        local players = cjson.decode(raw)
+        local host = players[1]
+        if #players == 1 and host ~= user_id then
+            table.insert(players, user_id)
+            local encoded = cjson.encode(players)
+            redis.call('HSET', room_key, 'players', encoded)
+            redis.call('EXPIRE', room_key, ARGV[5])
+            redis.call('PUBLISH', room_key .. ARGV[6], cjson.encode(
+                {type = 'joined', from = user_id}
+            ))
+            return {room_id, 'matched', encoded}
+        end
+    end
+end
+
+local now = tonumber(ARGV[7])
+local room_id = allocate_code(
+    {KEYS[4], KEYS[5], KEYS[6]}, tonumber(ARGV[3]), tonumber(ARGV[8]), prefix,
+    tonumber(ARGV[9]), now + tonumber(ARGV[4])
+)
+if not room_id then
+    return false
+end
+local players = cjson.encode({user_id})
+local room_key = prefix .. room_id
+redis.call('DEL', room_key)
+redis.call('HSET', room_key, 'type', 'waiting', 'players', players)
+redis.call('EXPIRE', room_key, ARGV[4])
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), room_id)
+redis.call('HSET', KEYS[2], user_id, room_id)
+redis.call('HSET', KEYS[3], room_id, user_id)
+return {room_id, 'waiting', players}
+"""
+
+REMOVE_SCRIPT = REMOVE_ROOM + """
+local removed = redis.call('ZSCORE', KEYS[1], ARGV[1])
+remove_room(ARGV[1])
+return removed and 1 or 0
+"""
+
+# ARGV = 현재 시각, 한 번에 정리할 최대 개수
+# 만료 시각이 지난 앞부분만 읽으므로 큐 전체를 훑지 않는다
+REAP_SCRIPT = REMOVE_ROOM + """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, room_id in ipairs(due) do
+    remove_room(room_id)
+end
+return #due
+"""
+
+
+class MatchQueue:
+    """
+    랜덤 매칭 대기열
+
+    대기방 코드를 만료 시각 순 sorted set에, 호스트 유저 <-> 대기방 매핑을
+    해시 두 개에 둔다. "이미 기다리는 중인가", "내가 호스트인가", "상대 방
+    꺼내기"가 모두 상수(또는 로그) 시간이며, 꺼내기는 Lua 스크립트 하나로
+    처리되어 두 유저가 같은 방을 동시에 차지할 수 없다. 아무도 꺼내 가지 않고
+    만료된 대기방은 reap이 주기적으로 정리한다.
+    """
+
+    QUEUE_KEY: ClassVar[str] = "match:waiting_rooms"
+    INDEX_KEY: ClassVar[str] = "match:waiting"
+    HOSTS_KEY: ClassVar[str] = "match:hosts"
+    REAP_BATCH_SIZE: ClassVar[int] = 500
+
+    def __init__(self, client: Optional[aioredis.Redis] = None):
+        self.client = client
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        return self.client or get_async_redis()
+
+    @property
+    def _match(self) -> AsyncScript:
+        return self.redis.register_script(MATCH_SCRIPT)
+
+    @property
+    def _remove(self) -> AsyncScript:
+        return self.redis.register_script(REMOVE_SCRIPT)
+
+    @property
+    def _reap(self) -> AsyncScript:
+        return self.redis.register_script(REAP_SCRIPT)
+
+    @property
+    def _keys(self) -> list[str]:
+        return [self.QUEUE_KEY, self.INDEX_KEY, self.HOSTS_KEY]
+
+    async def match(
+        self,
+        user_id: str,
+        room_codes: RoomCodeAllocator,
+        waiting_timeout: int,
+        room_timeout: int,
+    ) -> dict:
+        """
+        대기 중인 방과 매칭하거나 새 대기방 생성
+
+        Args:
+            user_id: 매칭을 요청한 유저 ID
+            room_codes: 매칭할 방이 없을 때 새 방 코드를 할당할 할당기
+            waiting_timeout: 새 대기방의 만료 시간(초)
+            room_timeout: 매칭된 방의 만료 시간(초)
+
+        Returns:
+            {"room_id", "status", "players"} 형태의 매칭 결과
+
+        Raises:
+            RuntimeError: 새 대기방이 필요한데 모든 코드가 사용 중인 경우
+        """
+        reply = await self._match(
+            keys=[*self._keys, *room_codes.keys],
+            args=[
+                user_id,
+                RoomStore.KEY_PREFIX,
+                room_codes.search_start(),
+                waiting_timeout,
+                room_timeout,
+                RoomStore.CHANNEL_SUFFIX,
+                time.time(),
+                room_codes.capacity,
+                room_codes.MIN_CODE,
+            ],
+        )
+        if reply is None:
+            raise RuntimeError("No free room code")
+        room_id, status, players = reply
+        return {
+            "room_id": room_id.decode("utf-8"),
+            "status": status.decode("utf-8"),
+            "players": json.loads(players),
+        }
+
+    async def remove(self, room_id: str) -> bool:
+        """
+        호스트가 떠났거나 다른 방법으로 인원이 찬 대기방을 대기열에서 제거
+
+        Returns:
+            대기열에 있던 방인지 여부
+        """
+        return bool(await self._remove(keys=self._keys, args=[room_id]))
+
+    async def reap(self, now: Optional[float] = None) -> int:
+        """
+        만료 시각이 지난 대기방을 대기열과 인덱스에서 정리
+
+        만료 시각 순으로 정렬되어 있으므로 정리할 대기방만 읽는다.
+
+        Returns:
+            정리한 대기방 수
+        """
+        now = time.time() if now is None else now
+        reaped = 0
+        while True:
+            count = await self._reap(keys=self._keys, args=[now, self.REAP_BATCH_SIZE])
+            reaped += count
+            if count < self.REAP_BATCH_SIZE:
+                return reaped
+
+    async def hosting_room(self, user_id: str) -> str | None:
+        room_id = await self.redis.hget(self.INDEX_KEY, user_id)
+        return room_id.decode("utf-8") if room_id else None
+
+    async def size(self) -> int:
+        """대기열에 있는 대기방 수"""
+        return await self.redis.zcard(self.QUEUE_KEY)
@@ -0,0 +1,235 @@
+import random
+import time
+from typing import ClassVar, Optional
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+from danso.redis_client import get_async_redis
+
+from .store import RoomStore
+
+# KEYS[1] = 사용 중 코드 비트맵 (비트 위치 = 코드 - MIN_CODE)
+# KEYS[2] = 코드 임대 만료 시각 sorted set, KEYS[3] = 사용 중 코드 수
+RELEASE_CODE = """
+local function release_code(offset)
+    if redis.call('SETBIT', KEYS[1], offset, 0) == 1 then
+        redis.call('DECR', KEYS[3])
+    end
+    redis.call('ZREM', KEYS[2], offset)
+end
+"""
+
+# codes = {사용 중 코드 비트맵, 임대 sorted set, 사용 중 코드 수} 키
+# start = 탐색 시작 바이트, size = 코드 수, prefix = 방 키 prefix, base = MIN_CODE
+# 임의의 위치부터 빈 비트를 찾으므로 사용률이 낮을 때는 첫 바이트에서 끝난다.
+# 비트맵 도입 전에 만들어진 방과 겹치면 그 코드는 사용 중으로 표시하고 넘어간다.
+# 모든 코드가 사용 중이면 false를 반환한다.
+ALLOCATE_CODE = """
+local function allocate_code(codes, start, size, prefix, base, expires)
+    while true do
+        local offset = redis.call('BITPOS', codes[1], 0, start)
+        if offset < 0 then
+            -- 시작 위치가 비트맵 끝을 넘으면 그 뒤는 모두 빈 비트다
+            offset = start * 8
+        end
+        if offset >= size then
+            if start == 0 then
+                return false
+            end
+            start = 0
+            offset = redis.call('BITPOS', codes[1], 0, 0)
+            if offset >= size then
+                return false
+            end
+        end
+        redis.call('SETBIT', codes[1], offset, 1)
+        redis.call('INCR', codes[3])
+        redis.call('ZADD', codes[2], expires, offset)
+        local code = tostring(base + offset)
+        if redis.call('EXISTS', prefix .. code) == 0 then
+            return code
+        end
+    end
+end
+"""
+
+# ARGV = 탐색 시작 바이트, 코드 수, 방 키 prefix, MIN_CODE, 임대 만료 시각
+ALLOCATE_SCRIPT = ALLOCATE_CODE + """
+return allocate_code(
+    KEYS, tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3], tonumber(ARGV[4]), ARGV[5]
+)
+"""
+
+# ARGV = 코드 위치, 임대 만료 시각
+CLAIM_SCRIPT = """
+if redis.call('SETBIT', KEYS[1], ARGV[1], 1) == 1 then
+    return 0
+end
+redis.call('INCR', KEYS[3])
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+return 1
+"""
+
+RELEASE_SCRIPT = RELEASE_CODE + """
+release_code(ARGV[1])
+return 1
+"""
+
+# ARGV = 현재 시각, 한 번에 확인할 최대 개수, 방 키 prefix, MIN_CODE, 기본 임대 시간
+# 임대가 끝난 코드만 읽어서, 방이 남아 있으면 방의 남은 TTL만큼 연장하고
+# 방이 없으면 반납한다.
+REAP_SCRIPT = RELEASE_CODE + """
+local now = tonumber(ARGV[1])
+local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, ARGV[2])
+local released = 0
+for _, offset in ipairs(due) do
+    local ttl = redis.call('TTL', ARGV[3] .. (tonumber(ARGV[4]) + tonumber(offset)))
+    if ttl == -2 then
+        release_code(offset)
+        released = released + 1
+    else
+        if ttl < 0 then
+            ttl = tonumber(ARGV[5])
+        end
+        redis.call('ZADD', KEYS[2], now + ttl, offset)
+    end
+end
+return {#due, released}
+"""
+
+
+class RoomCodeAllocator:
+    """
+    6자리 방 코드 할당기
+
+    사용 중인 코드를 Redis 비트맵(900,000비트, 약 110KB)에 표시하고 Lua
+    스크립트로 빈 코드를 찾아 바로 표시하므로, 여러 워커가 동시에 할당해도
+    같은 코드가 나가지 않는다. 탐색은 임의의 위치에서 시작해 코드가 순서대로
+    나가지 않는다. 방이 TTL로 사라진 코드는 임대 만료 시각 순으로 정리한다.
+    """
+
+    MIN_CODE: ClassVar[int] = 100000
+    MAX_CODE: ClassVar[int] = 999999
+    BITMAP_KEY: ClassVar[str] = "room_codes:used"
+    LEASES_KEY: ClassVar[str] = "room_codes:leases"
+    COUNT_KEY: ClassVar[str] = "room_codes:count"
+    REAP_BATCH_SIZE: ClassVar[int] = 500
+
+    def __init__(self, client: Optional[aioredis.Redis] = None):
+        self.client = client
+
+    @property
+    def capacity(self) -> int:
+        return self.MAX_CODE - self.MIN_CODE + 1
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        return self.client or get_async_redis()
+
+    @property
+    def _allocate(self) -> AsyncScript:
+        return self.redis.register_script(ALLOCATE_SCRIPT)
+
+    @property
+    def _claim(self) -> AsyncScript:
+        return self.redis.register_script(CLAIM_SCRIPT)
+
+    @property
+    def _release(self) -> AsyncScript:
+        return self.redis.register_script(RELEASE_SCRIPT)
+
+    @property
+    def _reap(self) -> AsyncScript:
+        return self.redis.register_script(REAP_SCRIPT)
+
+    @property
+    def keys(self) -> list[str]:
+        """할당 스크립트에 넘기는 키 (비트맵, 임대, 사용 중 코드 수)"""
+        return [self.BITMAP_KEY, self.LEASES_KEY, self.COUNT_KEY]
+
+    def search_start(self) -> int:
+        """빈 코드를 찾기 시작할 임의의 바이트 위치"""
+        return random.randrange(self.capacity // 8)
+
+    def _offset(self, code: str) -> Optional[int]:
+        if not code.isdigit() or not self.MIN_CODE <= int(code) <= self.MAX_CODE:
+            return None
+        return int(code) - self.MIN_CODE
+
+    async def allocate(self, lease: int) -> str:
+        """
+        사용하지 않는 코드 하나를 할당
+
+        Args:
+            lease: 방 TTL(초). 이 시간이 지나면 방이 남아 있는지 확인한다
+
+        Raises:
+            RuntimeError: 모든 코드가 사용 중인 경우
+        """
+        code = await self._allocate(
+            keys=self.keys,
+            args=[
+                self.search_start(),
+                self.capacity,
+                RoomStore.KEY_PREFIX,
+                self.MIN_CODE,
+                time.time() + lease,
+            ],
+        )
+        if code is None:
+            raise RuntimeError("No free room code")
+        return code.decode("utf-8")
+
+    async def claim(self, code: str, lease: int) -> bool:
+        """
+        유저가 지정한 코드로 방을 만들었을 때 사용 중으로 표시
+
+        Returns:
+            새로 표시했는지 여부 (6자리 코드가 아니거나 이미 사용 중이면 False)
+        """
+        offset = self._offset(code)
+        if offset is None:
+            return False
+        return bool(
+            await self._claim(keys=self.keys, args=[offset, time.time() + lease])
+        )
+
+    async def release(self, code: str) -> None:
+        """방이 끝났거나 모두 나갔을 때 코드 반납"""
+        offset = self._offset(code)
+        if offset is not None:
+            await self._release(keys=self.keys, args=[offset])
+
+    async def reap(self, default_lease: int, now: Optional[float] = None) -> int:
+        """
+        임대가 끝난 코드 중 방이 사라진 코드를 반납
+
+        Returns:
+            반납한 코드 수
+        """
+        now = time.time() if now is None else now
+        released = 0
+        while True:
+            checked, count = await self._reap(
+                keys=self.keys,
+                args=[
+                    now,
+                    self.REAP_BATCH_SIZE,
+                    RoomStore.KEY_PREFIX,
+                    self.MIN_CODE,
+                    default_lease,
+                ],
+            )
+            released += count
+            if checked < self.REAP_BATCH_SIZE:
+                return released
+
+    async def occupancy(self) -> dict:
+        """사용 중인 코드 수와 비율"""
+        allocated = int(await self.redis.get(self.COUNT_KEY) or 0)
+        return {
+            "allocated": allocated,
+            "capacity": self.capacity,
+            "occupancy": allocated / self.capacity,
+        }
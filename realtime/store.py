@@ -0,0 +1,540 @@
+import json
+from typing import Any, ClassVar, Optional
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+from danso.redis_client import get_async_redis
+
+# 방 하나는 Redis 해시 하나(room:<id>)에 저장된다.
+#   type            -> "waiting" | "custom"
+#   players         -> JSON 배열
+#   game            -> JSON 객체
+#   status:<user>   -> 유저별 게임 상태 JSON
+# 유저별 대기 이벤트는 방 해시와 따로 리스트(room:<id>:events:<user>)에 쌓는다.
+# 여러 필드를 건드리는 연산은 Lua 스크립트로 서버에서 원자적으로 처리한다.
+
+# ARGV[n] = 이벤트 리스트 키 prefix (room:<id>:events:)
+DELETE_ROOM = """
+local function delete_room(events_prefix)
+    local raw = redis.call('HGET', KEYS[1], 'players')
+    if raw then
+        for _, player in ipairs(cjson.decode(raw)) do
+            redis.call('DEL', events_prefix .. player)
+        end
+    end
+    redis.call('DEL', KEYS[1])
+end
+"""
+
+JOIN_ROOM_SCRIPT = """
+local raw = redis.call('HGET', KEYS[1], 'players')
+local players = {}
+if raw then
+    players = cjson.decode(raw)
+elseif ARGV[3] == '' then
+    return false
+else
+    redis.call('HSET', KEYS[1], 'type', ARGV[3])
+end
+local found = false
+for _, player in ipairs(players) do
+    if player == ARGV[1] then
+        found = true
+    end
+end
+if not found then
+    table.insert(players, ARGV[1])
+end
+redis.call('HSET', KEYS[1], 'players', cjson.encode(players))
+if ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[1], 'status:' .. ARGV[1], ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return cjson.encode(players)
+"""
+
+LEAVE_ROOM_SCRIPT = """
+local raw = redis.call('HGET', KEYS[1], 'players')
+if not raw then
+    return -1
+end
+local remaining = {}
+local found = false
+for _, player in ipairs(cjson.decode(raw)) do
+    if player == ARGV[1] then
+        found = true
+    else
+        table.insert(remaining, player)
+    end
+end
+if not found then
+    return -1
+end
+redis.call('DEL', ARGV[3] .. ARGV[1])
+if #remaining == 0 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'players', cjson.encode(remaining))
+redis.call('HDEL', KEYS[1], 'status:' .. ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return #remaining
+"""
+
+DAMAGE_SCRIPT = """
+local field = 'status:' .. ARGV[1]
+local raw = redis.call('HGET', KEYS[1], field)
+if not raw then
+    return 0
+end
+local status = cjson.decode(raw)
+status['heart'] = math.max(0, (tonumber(status['heart']) or 0) - 1)
+redis.call('HSET', KEYS[1], field, cjson.encode(status))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# ARGV = user_id, 이벤트, 방 TTL, 이벤트 리스트 키 prefix
+PUSH_EVENT_SCRIPT = """
+local raw = redis.call('HGET', KEYS[1], 'players')
+if not raw then
+    return 0
+end
+for _, player in ipairs(cjson.decode(raw)) do
+    if player ~= ARGV[1] then
+        local events_key = ARGV[4] .. player
+        redis.call('RPUSH', events_key, ARGV[2])
+        redis.call('EXPIRE', events_key, ARGV[3])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# KEYS[1] = 방 키, KEYS[2] = 방 pub/sub 채널
+# ARGV = user_id, now_text, position, heart, 현재 시각, 게임 타임아웃(초), 방 TTL,
+#        이벤트 리스트 키 prefix
+# 타임아웃 확인, 내 상태 기록, 상대방 상태 조회, 내 이벤트 비우기를 한 번에 처리한다.
+HEARTBEAT_SCRIPT = DELETE_ROOM + """
+local user_id = ARGV[1]
+local now = tonumber(ARGV[5])
+
+local raw = redis.call('HGET', KEYS[1], 'players')
+if not raw then
+    return {'not_found'}
+end
+local players = cjson.decode(raw)
+local is_member = false
+for _, player in ipairs(players) do
+    if player == user_id then
+        is_member = true
+    end
+end
+if not is_member then
+    return {'forbidden'}
+end
+
+for _, player in ipairs(players) do
+    local status = redis.call('HGET', KEYS[1], 'status:' .. player)
+    if status then
+        local last_heartbeat = cjson.decode(status)['last_heartbeat']
+        if last_heartbeat and now - last_heartbeat > tonumber(ARGV[6]) then
+            delete_room(ARGV[8])
+            redis.call('PUBLISH', KEYS[2], cjson.encode(
+                {type = 'event', from = user_id, event = 'game_ended'}
+            ))
+            return {'ended'}
+        end
+    end
+end
+
+local total = tonumber(redis.call('HGET', KEYS[1], 'sentence_count'))
+if total and total > 0 then
+    local position = tonumber(ARGV[3])
+    local status = {
+        now_text = ARGV[2],
+        position = position,
+        heart = tonumber(ARGV[4]),
+        completion_percentage = position / total * 100,
+        last_heartbeat = now,
+    }
+    redis.call('HSET', KEYS[1], 'status:' .. user_id, cjson.encode(status))
+    redis.call('PUBLISH', KEYS[2], cjson.encode(
+        {type = 'status', from = user_id, status = status}
+    ))
+end
+
+local opponent_id = ''
+local opponent_status = ''
+for _, player in ipairs(players) do
+    if player ~= user_id then
+        opponent_id = player
+        opponent_status = redis.call('HGET', KEYS[1], 'status:' .. player) or ''
+        break
+    end
+end
+
+local events_key = ARGV[8] .. user_id
+local events = redis.call('LRANGE', events_key, 0, -1)
+if #events > 0 then
+    redis.call('DEL', events_key)
+end
+
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return {'ok', raw, opponent_id, opponent_status, events}
+"""
+
+# KEYS[1] = 방 키, KEYS[2] = 방 pub/sub 채널
+# ARGV = user_id, 타이머를 예약한 하트비트 시각, 이벤트 ("timeout" | "game_ended"), 방 TTL,
+#        이벤트 리스트 키 prefix
+# 그 뒤로 하트비트가 없었을 때만 이벤트를 발생시킨다. 다른 워커가 더 새로운
+# 하트비트를 받았다면 그 워커의 타이머가 대신 처리한다.
+HEARTBEAT_EXPIRED_SCRIPT = DELETE_ROOM + """
+local status = redis.call('HGET', KEYS[1], 'status:' .. ARGV[1])
+if not status then
+    return 0
+end
+local last_heartbeat = cjson.decode(status)['last_heartbeat']
+-- cjson은 숫자를 유효숫자 14자리로 저장하므로 약간의 오차를 허용한다
+if not last_heartbeat or last_heartbeat > tonumber(ARGV[2]) + 0.001 then
+    return 0
+end
+
+local message = cjson.encode({type = 'event', from = ARGV[1], event = ARGV[3]})
+if ARGV[3] == 'game_ended' then
+    delete_room(ARGV[5])
+    redis.call('PUBLISH', KEYS[2], message)
+    return 1
+end
+
+for _, player in ipairs(cjson.decode(redis.call('HGET', KEYS[1], 'players'))) do
+    if player ~= ARGV[1] then
+        local events_key = ARGV[5] .. player
+        redis.call('RPUSH', events_key, ARGV[3])
+        redis.call('EXPIRE', events_key, ARGV[4])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('PUBLISH', KEYS[2], message)
+return 1
+"""
+
+# 두 플레이어가 동시에 게임을 골라도 먼저 기록된 게임 하나로 통일한다
+INIT_GAME_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local game = redis.call('HGET', KEYS[1], 'game')
+if game then
+    return game
+end
+redis.call('HSET', KEYS[1], 'game', ARGV[1], 'sentence_count', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return ARGV[1]
+"""
+
+
+class RoomStore:
+    """
+    Redis 해시 기반 실시간 방 저장소
+
+    방 전체를 직렬화해 덮어쓰지 않고 필드 단위로 읽고 쓰기 때문에
+    여러 워커가 같은 방을 동시에 갱신해도 서로의 변경을 덮어쓰지 않는다.
+    모든 명령은 redis.asyncio로 보내므로 이벤트 루프를 막지 않는다.
+    """
+
+    KEY_PREFIX: ClassVar[str] = "room:"
+    STATUS_PREFIX: ClassVar[str] = "status:"
+    EVENTS_SUFFIX: ClassVar[str] = ":events:"
+    CHANNEL_SUFFIX: ClassVar[str] = ":updates"
+    ROOM_TTL: ClassVar[int] = 3600
+
+    def __init__(self, client: Optional[aioredis.Redis] = None):
+        self.client = client
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        return self.client or get_async_redis()
+
+    # 스크립트는 클라이언트에 묶이므로 매번 현재 클라이언트로 만든다 (SHA만 계산)
+    @property
+    def _join_room(self) -> AsyncScript:
+        return self.redis.register_script(JOIN_ROOM_SCRIPT)
+
+    @property
+    def _leave_room(self) -> AsyncScript:
+        return self.redis.register_script(LEAVE_ROOM_SCRIPT)
+
+    @property
+    def _init_game(self) -> AsyncScript:
+        return self.redis.register_script(INIT_GAME_SCRIPT)
+
+    @property
+    def _heartbeat(self) -> AsyncScript:
+        return self.redis.register_script(HEARTBEAT_SCRIPT)
+
+    @property
+    def _damage(self) -> AsyncScript:
+        return self.redis.register_script(DAMAGE_SCRIPT)
+
+    @property
+    def _push_event(self) -> AsyncScript:
+        return self.redis.register_script(PUSH_EVENT_SCRIPT)
+
+    @property
+    def _heartbeat_expired(self) -> AsyncScript:
+        return self.redis.register_script(HEARTBEAT_EXPIRED_SCRIPT)
+
+    @classmethod
+    def key(cls, room_id: str) -> str:
+        return f"{cls.KEY_PREFIX}{room_id}"
+
+    @classmethod
+    def events_prefix(cls, room_id: str) -> str:
+        return f"{cls.KEY_PREFIX}{room_id}{cls.EVENTS_SUFFIX}"
+
+    @classmethod
+    def events_key(cls, room_id: str, user_id: str) -> str:
+        """유저별 대기 이벤트 리스트"""
+        return f"{cls.events_prefix(room_id)}{user_id}"
+
+    @classmethod
+    def channel(cls, room_id: str) -> str:
+        """방 변경 알림용 pub/sub 채널"""
+        return f"{cls.KEY_PREFIX}{room_id}{cls.CHANNEL_SUFFIX}"
+
+    async def publish(self, room_id: str, message: dict) -> None:
+        await self.redis.publish(self.channel(room_id), json.dumps(message))
+
+    async def exists(self, room_id: str) -> bool:
+        return bool(await self.redis.exists(self.key(room_id)))
+
+    async def create(
+        self,
+        room_id: str,
+        players: list[str],
+        room_type: str,
+        timeout: int,
+        player_status: Optional[dict[str, dict]] = None,
+    ) -> None:
+        """
+        새 방 생성
+
+        Args:
+            room_id: 방 코드
+            players: 초기 플레이어 목록
+            room_type: 방 종류 ("waiting", "custom")
+            timeout: 방 만료 시간(초)
+            player_status: 유저별 초기 상태
+        """
+        mapping = {"type": room_type, "players": json.dumps(players)}
+        for user_id, status in (player_status or {}).items():
+            mapping[f"{self.STATUS_PREFIX}{user_id}"] = json.dumps(status)
+
+        key = self.key(room_id)
+        async with self.redis.pipeline() as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, timeout)
+            await pipe.execute()
+
+    async def get(self, room_id: str) -> Optional[dict[str, Any]]:
+        """
+        방 전체 상태 조회
+
+        Returns:
+            {"type", "players", "player_status"[, "game"]} 형태의 dict,
+            방이 없으면 None
+        """
+        fields = await self.redis.hgetall(self.key(room_id))
+        if not fields:
+            return None
+
+        room: dict[str, Any] = {"player_status": {}}
+        for raw_field, value in fields.items():
+            field = raw_field.decode("utf-8")
+            if field == "type":
+                room["type"] = value.decode("utf-8")
+            elif field.startswith(self.STATUS_PREFIX):
+                room["player_status"][field[len(self.STATUS_PREFIX) :]] = json.loads(
+                    value
+                )
+            else:
+                room[field] = json.loads(value)
+        return room
+
+    async def get_field(self, room_id: str, field: str) -> Any:
+        value = await self.redis.hget(self.key(room_id), field)
+        return json.loads(value) if value is not None else None
+
+    async def join(
+        self,
+        room_id: str,
+        user_id: str,
+        status: Optional[dict] = None,
+        create_type: Optional[str] = None,
+        timeout: int = ROOM_TTL,
+    ) -> Optional[list[str]]:
+        """
+        방에 플레이어를 원자적으로 추가
+
+        Args:
+            room_id: 방 코드
+            user_id: 추가할 유저 ID
+            status: 함께 기록할 초기 상태 (None이면 기록하지 않음)
+            create_type: 방이 없을 때 이 종류로 새로 만든다 (None이면 만들지 않음)
+            timeout: 방 만료 시간(초)
+
+        Returns:
+            갱신된 플레이어 목록, 방이 없고 생성하지 않았다면 None
+        """
+        players = await self._join_room(
+            keys=[self.key(room_id)],
+            args=[
+                user_id,
+                json.dumps(status) if status is not None else "",
+                create_type or "",
+                timeout,
+            ],
+        )
+        return json.loads(players) if players else None
+
+    async def leave(self, room_id: str, user_id: str) -> int:
+        """
+        방에서 플레이어 제거. 마지막 플레이어가 나가면 방을 삭제한다.
+
+        Returns:
+            남은 플레이어 수, 방이 없거나 참가자가 아니면 -1
+        """
+        return int(
+            await self._leave_room(
+                keys=[self.key(room_id)],
+                args=[user_id, self.ROOM_TTL, self.events_prefix(room_id)],
+            )
+        )
+
+    @staticmethod
+    def sentence_count(game_data: dict) -> int:
+        # 문장세트 저장 시점에 계산해 둔 값을 우선 사용
+        if "sentence_count" in game_data:
+            return game_data["sentence_count"]
+        return len(game_data.get("sentences", []))
+
+    async def init_game(self, room_id: str, game_data: dict) -> Optional[dict]:
+        """
+        방에 게임이 없을 때만 기록
+
+        Returns:
+            방에 최종적으로 기록된 게임, 방이 없으면 None
+        """
+        game = await self._init_game(
+            keys=[self.key(room_id)],
+            args=[
+                json.dumps(game_data),
+                self.sentence_count(game_data),
+                self.ROOM_TTL,
+            ],
+        )
+        return json.loads(game) if game else None
+
+    async def damage(self, room_id: str, user_id: str) -> bool:
+        """유저의 하트를 1 감소 (0 미만으로 내려가지 않음)"""
+        return bool(
+            await self._damage(keys=[self.key(room_id)], args=[user_id, self.ROOM_TTL])
+        )
+
+    async def push_event(self, room_id: str, user_id: str, event_type: str) -> bool:
+        """user_id를 제외한 방의 모든 플레이어의 이벤트 큐 뒤에 이벤트 추가"""
+        return bool(
+            await self._push_event(
+                keys=[self.key(room_id)],
+                args=[user_id, event_type, self.ROOM_TTL, self.events_prefix(room_id)],
+            )
+        )
+
+    async def drain_events(self, room_id: str, user_id: str) -> list[str]:
+        """유저에게 쌓인 이벤트를 순서대로 모두 꺼내고 비운다 (원자적)"""
+        key = self.events_key(room_id, user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            events, _ = await pipe.execute()
+        return [event.decode("utf-8") for event in events]
+
+    async def heartbeat(
+        self,
+        room_id: str,
+        user_id: str,
+        now_text: str,
+        position: int,
+        heart: int,
+        now: float,
+        game_timeout: int,
+    ) -> dict[str, Any]:
+        """
+        하트비트 한 번을 저장소 왕복 한 번으로 처리
+
+        Args:
+            room_id: 방 코드
+            user_id: 하트비트를 보낸 유저 ID
+            now_text: 현재 입력 중인 문장
+            position: 현재 문장 위치
+            heart: 남은 하트 수
+            now: 현재 시각 (time.time())
+            game_timeout: 이 시간(초) 이상 하트비트가 없는 플레이어가 있으면 게임 종료
+
+        Returns:
+            {"result": "not_found" | "forbidden" | "ended" | "ok"} 에
+            "ok"일 때는 players, opponent_id, opponent_status, events가 추가된 dict
+        """
+        reply = await self._heartbeat(
+            keys=[self.key(room_id), self.channel(room_id)],
+            args=[
+                user_id,
+                now_text,
+                position,
+                heart,
+                now,
+                game_timeout,
+                self.ROOM_TTL,
+                self.events_prefix(room_id),
+            ],
+        )
+        result = reply[0].decode("utf-8")
+        if result != "ok":
+            return {"result": result}
+
+        _, players, opponent_id, opponent_status, events = reply
+        return {
+            "result": result,
+            "players": json.loads(players),
+            "opponent_id": opponent_id.decode("utf-8") or None,
+            "opponent_status": json.loads(opponent_status) if opponent_status else None,
+            "events": [event.decode("utf-8") for event in events],
+        }
+
+    async def heartbeat_expired(
+        self, room_id: str, user_id: str, last_heartbeat: float, event: str
+    ) -> bool:
+        """
+        last_heartbeat 이후 하트비트가 없었다면 이벤트 발생
+
+        Args:
+            event: "timeout"이면 상대방에게 이벤트 전달, "game_ended"면 방 삭제
+
+        Returns:
+            이벤트를 발생시켰는지 여부
+        """
+        return bool(
+            await self._heartbeat_expired(
+                keys=[self.key(room_id), self.channel(room_id)],
+                args=[
+                    user_id,
+                    last_heartbeat,
+                    event,
+                    self.ROOM_TTL,
+                    self.events_prefix(room_id),
+                ],
+            )
+        )
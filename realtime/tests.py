@@ -1,3 +1,298 @@
-from django.test import TestCase
+import math
+import random
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from .manager import RealtimeRoomManager
+from .matchmaking import MatchQueue
+from .room_codes import RoomCodeAllocator
+from .store import RoomStore
+from .timer_wheel import TimerWheel
+
+
+class TimerWheelTests(SimpleTestCase):
+    def test_expires_on_scheduled_tick(self):
+        wheel = TimerWheel(tick=1.0, slots=4, levels=2, now=0.0)
+        wheel.schedule("a", 3, payload="p", now=0.0)
+        self.assertEqual(wheel.advance(2.9), [])
+        self.assertEqual(wheel.advance(3.0), [("a", "p")])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cascades_from_upper_levels(self):
+        # slots=4, levels=3이면 1단은 4tick, 2단은 16tick, 3단은 64tick까지 담는다
+        wheel = TimerWheel(tick=1.0, slots=4, levels=3, now=0.0)
+        for delay in (5, 17, 40, 63):
+            wheel.schedule(delay, delay, now=0.0)
+        expired = {}
+        for tick in range(1, 70):
+            for key, _ in wheel.advance(float(tick)):
+                expired[key] = tick
+        self.assertEqual(expired, {5: 5, 17: 17, 40: 40, 63: 63})
+
+    def test_beyond_top_level_is_replaced(self):
+        # 가장 위 단보다 먼 타이머도 끝 칸을 거쳐 제시간에 만료된다
+        wheel = TimerWheel(tick=1.0, slots=4, levels=2, now=0.0)
+        wheel.schedule("far", 50, now=0.0)
+        self.assertEqual(wheel.advance(49.0), [])
+        self.assertEqual(wheel.advance(50.0), [("far", None)])
+
+    def test_reschedule_and_cancel(self):
+        wheel = TimerWheel(tick=1.0, slots=4, levels=2, now=0.0)
+        wheel.schedule("a", 2, now=0.0)
+        wheel.schedule("a", 6, now=0.0)
+        wheel.schedule("b", 3, now=0.0)
+        self.assertTrue(wheel.cancel("b"))
+        self.assertFalse(wheel.cancel("b"))
+        self.assertEqual(wheel.advance(5.0), [])
+        self.assertEqual(wheel.advance(6.0), [("a", None)])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(1234)
+        tick = 0.25
+        wheel = TimerWheel(tick=tick, slots=8, levels=3, now=0.0)
+        pending: dict[int, int] = {}
+        now = 0.0
+        for key in range(3000):
+            now += rng.random() * 2
+            if pending and rng.random() < 0.2:
+                victim = rng.choice(list(pending))
+                self.assertTrue(wheel.cancel(victim))
+                del pending[victim]
+            delay = rng.choice((rng.random() * 5, rng.random() * 200))
+            wheel.schedule(key, delay, now=now)
+            current = int(now / tick)
+            pending[key] = max(math.ceil((now + delay) / tick), wheel._ticks + 1)
+
+            expired = {key for key, _ in wheel.advance(now)}
+            due = {key for key, expires in pending.items() if expires <= current}
+            self.assertEqual(expired, due)
+            for key in due:
+                del pending[key]
+            self.assertEqual(len(wheel), len(pending))
+
+
+class RedisScriptTestCase(SimpleTestCase):
+    def setUp(self):
+        # Lua 스크립트까지 실행하는 인메모리 Redis (테스트마다 새 서버)
+        self.redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+class SmallRoomCodeAllocator(RoomCodeAllocator):
+    # 코드 16개만 쓰는 할당기로 비트맵이 가득 찬 경우를 확인한다
+    MAX_CODE = RoomCodeAllocator.MIN_CODE + 15
+
+
+class RoomCodeAllocatorTests(RedisScriptTestCase):
+    async def test_allocate_claim_release(self):
+        codes = RoomCodeAllocator(self.redis)
+        code = await codes.allocate(lease=60)
+        self.assertTrue(codes.MIN_CODE <= int(code) <= codes.MAX_CODE)
+        self.assertFalse(await codes.claim(code, lease=60))
+        self.assertEqual((await codes.occupancy())["allocated"], 1)
+
+        await codes.release(code)
+        self.assertEqual((await codes.occupancy())["allocated"], 0)
+        self.assertTrue(await codes.claim(code, lease=60))
+        self.assertFalse(await codes.claim("abc", lease=60))
+        self.assertFalse(await codes.claim("99999", lease=60))
+
+    async def test_full_bitmap(self):
+        codes = SmallRoomCodeAllocator(self.redis)
+        allocated = {await codes.allocate(lease=60) for _ in range(codes.capacity)}
+        self.assertEqual(len(allocated), codes.capacity)
+        with self.assertRaises(RuntimeError):
+            await codes.allocate(lease=60)
+
+        await codes.release(str(codes.MIN_CODE + 3))
+        self.assertEqual(await codes.allocate(lease=60), str(codes.MIN_CODE + 3))
+
+    async def test_skips_codes_of_existing_rooms(self):
+        codes = SmallRoomCodeAllocator(self.redis)
+        await self.redis.set(RoomStore.key(str(codes.MIN_CODE)), "legacy")
+        allocated = {await codes.allocate(lease=60) for _ in range(codes.capacity - 1)}
+        self.assertNotIn(str(codes.MIN_CODE), allocated)
+        with self.assertRaises(RuntimeError):
+            await codes.allocate(lease=60)
+
+    async def test_reap_releases_only_vanished_rooms(self):
+        codes = RoomCodeAllocator(self.redis)
+        gone = await codes.allocate(lease=10)
+        alive = await codes.allocate(lease=10)
+        await self.redis.set(RoomStore.key(alive), "room", ex=600)
+
+        released = await codes.reap(default_lease=60, now=time.time() + 11)
+        self.assertEqual(released, 1)
+        self.assertTrue(await codes.claim(gone, lease=60))
+        self.assertFalse(await codes.claim(alive, lease=60))
+        # 살아 있는 방의 임대는 남은 TTL만큼 연장된다
+        self.assertEqual(await codes.reap(default_lease=60, now=time.time() + 11), 0)
+
+
+class MatchQueueTests(RedisScriptTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = MatchQueue(self.redis)
+        self.codes = RoomCodeAllocator(self.redis)
+
+    async def match(self, user_id: str) -> dict:
+        return await self.queue.match(
+            user_id, self.codes, waiting_timeout=30, room_timeout=3600
+        )
+
+    async def test_waiting_then_matched(self):
+        waiting = await self.match("a")
+        self.assertEqual(waiting["status"], "waiting")
+        self.assertEqual(waiting["players"], ["a"])
+        self.assertEqual(await self.queue.hosting_room("a"), waiting["room_id"])
+        self.assertEqual((await self.codes.occupancy())["allocated"], 1)
+
+        # 이미 기다리는 유저는 같은 방을 다시 받는다
+        self.assertEqual(await self.match("a"), waiting)
+        self.assertEqual(await self.queue.size(), 1)
+
+        matched = await self.match("b")
+        self.assertEqual(matched["status"], "matched")
+        self.assertEqual(matched["room_id"], waiting["room_id"])
+        self.assertEqual(matched["players"], ["a", "b"])
+        self.assertEqual(await self.queue.size(), 0)
+        self.assertIsNone(await self.queue.hosting_room("a"))
+        # 매칭에는 새 코드를 할당하지 않는다
+        self.assertEqual((await self.codes.occupancy())["allocated"], 1)
+
+    async def test_skips_vanished_rooms(self):
+        waiting = await self.match("a")
+        await self.redis.delete(RoomStore.key(waiting["room_id"]))
+
+        result = await self.match("b")
+        self.assertEqual(result["status"], "waiting")
+        self.assertNotEqual(result["room_id"], waiting["room_id"])
+        self.assertIsNone(await self.queue.hosting_room("a"))
+        self.assertEqual(await self.queue.size(), 1)
+
+    async def test_no_free_code(self):
+        self.codes = SmallRoomCodeAllocator(self.redis)
+        for code in range(self.codes.MIN_CODE, self.codes.MAX_CODE + 1):
+            await self.codes.claim(str(code), lease=60)
+        with self.assertRaises(RuntimeError):
+            await self.match("a")
+        self.assertEqual(await self.queue.size(), 0)
+        self.assertIsNone(await self.queue.hosting_room("a"))
+
+    async def test_remove(self):
+        waiting = await self.match("a")
+        self.assertTrue(await self.queue.remove(waiting["room_id"]))
+        self.assertFalse(await self.queue.remove(waiting["room_id"]))
+        self.assertIsNone(await self.queue.hosting_room("a"))
+        self.assertEqual(await self.queue.size(), 0)
+
+    async def test_reap(self):
+        await self.match("a")
+        self.assertEqual(await self.queue.reap(now=time.time()), 0)
+        self.assertEqual(await self.queue.reap(now=time.time() + 31), 1)
+        self.assertEqual(await self.queue.size(), 0)
+        self.assertIsNone(await self.queue.hosting_room("a"))
+
+
+class RoomStoreScriptTests(RedisScriptTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = RoomStore(self.redis)
+
+    async def create_game(self, room_id: str = "123456") -> None:
+        await self.store.create(room_id, ["a", "b"], "custom", timeout=3600)
+        await self.store.init_game(room_id, {"sentences": ["x", "y", "z", "w"]})
+
+    async def heartbeat(self, user_id: str, now: float, position: int = 1) -> dict:
+        return await self.store.heartbeat(
+            "123456", user_id, "text", position, 3, now, game_timeout=60
+        )
+
+    async def test_heartbeat(self):
+        await self.create_game()
+        await self.heartbeat("b", 1000.0)
+
+        result = await self.heartbeat("a", 1000.0, position=2)
+        self.assertEqual(result["result"], "ok")
+        self.assertEqual(result["players"], ["a", "b"])
+        self.assertEqual(result["opponent_id"], "b")
+        self.assertEqual(result["opponent_status"]["position"], 1)
+        self.assertEqual(result["events"], [])
+
+        status = (await self.store.get("123456"))["player_status"]["a"]
+        self.assertEqual(status["completion_percentage"], 50)
+        self.assertEqual(status["last_heartbeat"], 1000.0)
+
+    async def test_heartbeat_not_member(self):
+        self.assertEqual(await self.heartbeat("a", 1000.0), {"result": "not_found"})
+        await self.create_game()
+        self.assertEqual(await self.heartbeat("c", 1000.0), {"result": "forbidden"})
+
+    async def test_heartbeat_drains_events(self):
+        await self.create_game()
+        self.assertTrue(await self.store.push_event("123456", "b", "attack"))
+        self.assertTrue(await self.store.push_event("123456", "b", "attack2"))
+        self.assertEqual(
+            (await self.heartbeat("a", 1000.0))["events"], ["attack", "attack2"]
+        )
+        self.assertEqual((await self.heartbeat("a", 1001.0))["events"], [])
+        # 이벤트를 보낸 본인 큐에는 쌓이지 않는다
+        self.assertEqual(await self.store.drain_events("123456", "b"), [])
+
+    async def test_heartbeat_ends_stale_game(self):
+        await self.create_game()
+        await self.heartbeat("b", 1000.0)
+        self.assertEqual(await self.heartbeat("a", 1061.0), {"result": "ended"})
+        self.assertFalse(await self.store.exists("123456"))
+
+    async def test_heartbeat_expired(self):
+        await self.create_game()
+        await self.heartbeat("a", 1000.0)
+        await self.heartbeat("a", 1005.0)
+
+        # 더 새로운 하트비트가 있으면 예전 타이머는 아무것도 하지 않는다
+        self.assertFalse(
+            await self.store.heartbeat_expired("123456", "a", 1000.0, "timeout")
+        )
+        self.assertTrue(
+            await self.store.heartbeat_expired("123456", "a", 1005.0, "timeout")
+        )
+        self.assertEqual(await self.store.drain_events("123456", "b"), ["timeout"])
+        self.assertTrue(await self.store.exists("123456"))
+
+        self.assertTrue(
+            await self.store.heartbeat_expired("123456", "a", 1005.0, "game_ended")
+        )
+        self.assertFalse(await self.store.exists("123456"))
+        self.assertFalse(
+            await self.store.heartbeat_expired("123456", "b", 1005.0, "timeout")
+        )
+
+
+class RoomCodeOccupancyViewTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch.object(
+            RealtimeRoomManager, "room_codes", RoomCodeAllocator(self.redis)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_requires_staff(self):
+        response = await self.async_client.get("/realtime/metrics/room-codes")
+        self.assertEqual(response.status_code, 403)
+
+        user = await User.objects.acreate_user("player", password="x")
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get("/realtime/metrics/room-codes")
+        self.assertEqual(response.status_code, 403)
+
+    async def test_staff(self):
+        staff = await User.objects.acreate_user("staff", password="x", is_staff=True)
+        await self.async_client.aforce_login(staff)
+        response = await self.async_client.get("/realtime/metrics/room-codes")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["allocated"], 0)
@@ -0,0 +1,125 @@
+import math
+import time
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+class _Timer:
+    __slots__ = ("key", "expires", "payload", "slot")
+
+    def __init__(self, key: Hashable, expires: int, payload: Any):
+        self.key = key
+        self.expires = expires
+        self.payload = payload
+        self.slot: Optional[dict] = None
+
+
+class TimerWheel:
+    """
+    계층형 타이머 휠
+
+    tick 단위로 도는 바퀴를 levels단 겹쳐 두고, 만료까지 남은 tick 수에 맞는
+    단에 타이머를 넣는다. 위 단의 칸은 아래 단이 한 바퀴 돌 때마다 아래로
+    내려오므로, 타이머 수와 관계없이 tick마다 한 칸만 보면 된다.
+    같은 key로 다시 예약하면 이전 타이머는 취소된다 (추가/취소 모두 O(1)).
+    """
+
+    def __init__(
+        self,
+        tick: float,
+        slots: int = 64,
+        levels: int = 3,
+        now: Optional[float] = None,
+    ):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: list[list[dict[Hashable, _Timer]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._timers: dict[Hashable, _Timer] = {}
+        self._ticks = 0
+        self._started = time.monotonic() if now is None else now
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def _place(self, timer: _Timer) -> None:
+        remaining = timer.expires - self._ticks
+        width = 1
+        for level in range(self.levels):
+            if remaining < width * self.slots or level == self.levels - 1:
+                break
+            width *= self.slots
+        # 가장 위 단보다 먼 타이머는 끝 칸에 두고 내려올 때 다시 넣는다
+        expires = min(timer.expires, self._ticks + width * self.slots - 1)
+        slot = self._wheels[level][(expires // width) % self.slots]
+        slot[timer.key] = timer
+        timer.slot = slot
+
+    def schedule(
+        self,
+        key: Hashable,
+        delay: float,
+        payload: Any = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """delay초 뒤에 (key, payload)가 만료되도록 예약"""
+        now = time.monotonic() if now is None else now
+        # 바퀴가 늦게 돌고 있어도 예약 시점 기준으로 만료되도록 실제 시각으로 계산
+        expires = math.ceil((now - self._started + delay) / self.tick)
+        with self._lock:
+            previous = self._timers.pop(key, None)
+            if previous is not None:
+                del previous.slot[key]
+            timer = _Timer(key, max(expires, self._ticks + 1), payload)
+            self._timers[key] = timer
+            self._place(timer)
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            timer = self._timers.pop(key, None)
+            if timer is None:
+                return False
+            del timer.slot[key]
+            return True
+
+    def _cascade(self) -> None:
+        width = 1
+        for level in range(1, self.levels):
+            width *= self.slots
+            if self._ticks % width:
+                return
+            index = (self._ticks // width) % self.slots
+            slot = self._wheels[level][index]
+            self._wheels[level][index] = {}
+            for timer in slot.values():
+                self._place(timer)
+
+    def advance(self, now: Optional[float] = None) -> list[tuple[Hashable, Any]]:
+        """
+        now까지 바퀴를 돌리고 만료된 타이머를 꺼낸다
+
+        Returns:
+            만료된 (key, payload) 목록
+        """
+        now = time.monotonic() if now is None else now
+        target = int((now - self._started) / self.tick)
+        expired: list[tuple[Hashable, Any]] = []
+        with self._lock:
+            while self._ticks < target:
+                self._ticks += 1
+                self._cascade()
+                index = self._ticks % self.slots
+                slot = self._wheels[0][index]
+                if not slot:
+                    continue
+                self._wheels[0][index] = {}
+                for timer in slot.values():
+                    if timer.expires > self._ticks:
+                        self._place(timer)
+                        continue
+                    del self._timers[timer.key]
+                    expired.append((timer.key, timer.payload))
+        return expired
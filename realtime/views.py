@@ -1,16 +1,25 @@
+import json
+
 from adrf.decorators import api_view
-from asgiref.sync import sync_to_async
-from django.http import HttpRequest
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
 from rest_framework import status
+from rest_framework.decorators import permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from sentence.models import SentencePack
+from danso.redis_client import get_async_redis
+from sentence.sampler import sentence_pack_sampler
 from user.auth import login_code_to_user
 from user.models import GameUser
 from .manager import RealtimeRoomManager
+from .store import RoomStore
 
 room_manager = RealtimeRoomManager()
 
+# 대기 중 이벤트가 없을 때 연결 유지를 위해 주석을 보내는 간격(초)
+MATCH_STREAM_KEEPALIVE = 15
+
 
 @api_view(["POST"])
 async def match_player(request: HttpRequest):
@@ -21,21 +30,18 @@ async def match_player(request: HttpRequest):
         )
 
     user = await login_code_to_user(login_code)
-    get_random_game = sync_to_async(
-        lambda: SentencePack.objects.select_related("author").order_by("?").first()
-    )
-    random_game = await get_random_game()
+    random_game = await sentence_pack_sampler.apick_payload()
 
-    match_result = room_manager.join_random_room(str(user.id))
+    match_result = await room_manager.join_random_room(str(user.id))
 
     response_data = {
         "room_id": match_result["room_id"],
         "status": match_result["status"],
         "players": match_result["players"],
         "game": {
-            "id": random_game.id,
-            "name": random_game.name,
-            "author": random_game.author.nickname if random_game.author else "Unknown",
+            "id": random_game["id"],
+            "name": random_game["name"],
+            "author": random_game["author"] or "Unknown",
         },
     }
 
@@ -54,13 +60,10 @@ async def join_room(request: HttpRequest):
         )
 
     user = await login_code_to_user(login_code)
-    get_random_game = sync_to_async(
-        lambda: SentencePack.objects.select_related("author").order_by("?").first()
-    )
-    random_game = await get_random_game()
+    random_game = await sentence_pack_sampler.apick_payload()
 
     # 특정 방에 입장
-    join_result = room_manager.join_specific_room(room_id, str(user.id))
+    join_result = await room_manager.join_specific_room(room_id, str(user.id))
 
     if not join_result:
         return Response(
@@ -73,9 +76,9 @@ async def join_room(request: HttpRequest):
         "status": join_result["status"],
         "players": join_result["players"],
         "game": {
-            "id": random_game.id,
-            "name": random_game.name,
-            "author": random_game.author.nickname if random_game.author else "Unknown",
+            "id": random_game["id"],
+            "name": random_game["name"],
+            "author": random_game["author"] or "Unknown",
         },
     }
 
@@ -94,47 +97,115 @@ async def check_match_status(request: HttpRequest):
         )
 
     user = await login_code_to_user(login_code)
-    room = room_manager.get_room(room_id)
+    room = await room_manager.get_room(room_id)
 
     if not room:
         return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
 
     is_matched = len(room["players"]) >= 2
-    is_in_room = str(user.id) in room["players"]
+    response_data = match_status_data(room_id, room, str(user.id))
 
-    # 이미 게임이 선택되어 있는지 확인
-    existing_game = room_manager.get_room_game(room_id)
+    if is_matched:
+        existing_game = await get_or_pick_room_game(room_id)
+        if existing_game:
+            response_data["game"] = existing_game
 
-    if is_matched and not existing_game:
-        # 매칭되었고 아직 게임이 선택되지 않은 경우, 랜덤 게임 선택
-        get_random_game = sync_to_async(
-            lambda: SentencePack.objects.select_related("author").order_by("?").first()
-        )
-        random_game = await get_random_game()
-
-        game_data = {
-            "id": random_game.id,
-            "name": random_game.name,
-            "author": random_game.author.nickname if random_game.author else "Unknown",
-            "sentences": random_game.sentences.split("\r\n"),
-        }
+    return Response(response_data)
 
-        # 게임 데이터를 방 세션에 저장
-        room_manager.set_room_game(room_id, game_data)
-        existing_game = game_data
 
-    response_data = {
+def match_status_data(room_id: str, room: dict, user_id: str) -> dict:
+    return {
         "room_id": room_id,
-        "status": "matched" if is_matched else "waiting",
-        "is_in_room": is_in_room,
+        "status": "matched" if len(room["players"]) >= 2 else "waiting",
+        "is_in_room": user_id in room["players"],
         "players": room["players"],
         "player_count": len(room["players"]),
     }
 
-    if is_matched and existing_game:
-        response_data["game"] = existing_game
 
-    return Response(response_data)
+async def get_or_pick_room_game(room_id: str):
+    # 이미 게임이 선택되어 있는지 확인
+    existing_game = await room_manager.get_room_game(room_id)
+    if existing_game:
+        return existing_game
+
+    # 매칭되었고 아직 게임이 선택되지 않은 경우, 랜덤 게임 선택
+    random_game = await sentence_pack_sampler.apick_payload()
+
+    game_data = {
+        "id": random_game["id"],
+        "name": random_game["name"],
+        "author": random_game["author"] or "Unknown",
+        "sentences": random_game["parsed_sentences"]["texts"],
+        "sentence_count": random_game["parsed_sentences"]["sentence_count"],
+    }
+
+    # 게임 데이터를 방 세션에 저장. 두 플레이어가 동시에 골랐다면 먼저 저장된 게임을 사용
+    return await room_manager.init_room_game(room_id, game_data)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def match_status_events(room_id: str, user_id: str):
+    pubsub = get_async_redis().pubsub()
+    await pubsub.subscribe(RoomStore.channel(room_id))
+    try:
+        sent_waiting = False
+        while True:
+            room = await room_manager.get_room(room_id)
+            if not room:
+                yield format_sse("expired", {"room_id": room_id, "status": "expired"})
+                return
+
+            response_data = match_status_data(room_id, room, user_id)
+            if response_data["status"] == "matched":
+                game = await get_or_pick_room_game(room_id)
+                if not game:
+                    continue
+                response_data["game"] = game
+                yield format_sse("matched", response_data)
+                return
+
+            if not sent_waiting:
+                yield format_sse("waiting", response_data)
+                sent_waiting = True
+
+            # 방에 변화가 생기면 다시 확인하고, 조용하면 연결 유지용 주석을 보낸다
+            message = await pubsub.get_message(timeout=MATCH_STREAM_KEEPALIVE)
+            if message is None:
+                yield ": keep-alive\n\n"
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+async def match_status_stream(request: HttpRequest):
+    """매칭 상태를 Server-Sent Events로 전달합니다. (waiting, matched, expired)"""
+    # EventSource는 헤더를 지정할 수 없으므로 쿼리스트링도 허용
+    login_code = request.headers.get("X-Login-Code", None) or request.GET.get(
+        "login_code", None
+    )
+    room_id = request.GET.get("room_id", None)
+
+    if not login_code or not room_id:
+        return JsonResponse(
+            {"error": "Login code and room_id are required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        user = await login_code_to_user(login_code)
+    except AuthenticationFailed as e:
+        return JsonResponse({"error": str(e.detail)}, status=e.status_code)
+
+    response = StreamingHttpResponse(
+        match_status_events(room_id, str(user.id)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @api_view(["POST"])
@@ -151,32 +222,24 @@ async def in_game_heartbeat(request: HttpRequest, room_id: str):
         )
 
     user = await login_code_to_user(login_code)
-    room = room_manager.get_room(room_id)
 
-    if not room:
+    # 타임아웃 확인, 내 상태 갱신, 상대방 상태 조회, 이벤트 확인을 한 번에 처리
+    heartbeat = await room_manager.heartbeat(
+        room_id, str(user.id), now_text, int(position), int(heart)
+    )
+
+    if heartbeat["result"] == "not_found":
         return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    if str(user.id) not in room["players"]:
+    if heartbeat["result"] == "forbidden":
         return Response(
             {"error": "User is not in the room"}, status=status.HTTP_403_FORBIDDEN
         )
 
-    if room_manager.check_game_timeout(room_id):
-        room_manager.add_event(room_id, str(user.id), "game_ended")
-        room_manager.end_game(room_id)
+    if heartbeat["result"] == "ended":
         return Response({"event": "game_ended"}, status=status.HTTP_200_OK)
 
-    # 유저의 게임 상태 업데이트
-    room_manager.update_user_game_status(
-        room_id, str(user.id), now_text, int(position), int(heart)
-    )
-
-    # 상대방 상태 가져오기
-    opponent_status = room_manager.get_opponent_status(room_id, str(user.id))
-    events = room_manager.get_and_clear_events(room_id, str(user.id))
-
-    if events:
-        opponent_status["event"] = events[0]
+    opponent_status = heartbeat["opponent_status"]
 
     if not opponent_status:
         return Response(
@@ -185,8 +248,8 @@ async def in_game_heartbeat(request: HttpRequest, room_id: str):
 
     if (
         opponent_status.get("event") == "timeout"
-        and opponent_status["heart"] > 0
-        and len(room["players"]) >= 2
+        and opponent_status.get("heart", 0) > 0
+        and len(heartbeat["players"]) >= 2
     ):
         opponent_status["event"] = "reconnected"
 
@@ -204,8 +267,8 @@ async def leave_room(request: HttpRequest, room_id: str):
 
     user = await login_code_to_user(login_code)
 
-    if room_manager.leave_room(room_id, str(user.id)):
-        room_manager.add_event(room_id, str(user.id), "left")
+    if await room_manager.leave_room(room_id, str(user.id)):
+        await room_manager.add_event(room_id, str(user.id), "left")
         return Response({"status": "success"})
 
     return Response(
@@ -225,11 +288,22 @@ async def missed_word(request: HttpRequest, room_id: str):
     user = await login_code_to_user(login_code)
 
     # 하트 감소
-    if room_manager.missed_word(room_id, str(user.id)):
+    if await room_manager.missed_word(room_id, str(user.id)):
         # 상대방에게 damaged 이벤트 전달
-        room_manager.add_event(room_id, str(user.id), "damaged")
+        await room_manager.add_event(room_id, str(user.id), "damaged")
         return Response({"status": "success"})
 
     return Response(
         {"error": "Failed to process missed word"}, status=status.HTTP_400_BAD_REQUEST
     )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+async def room_code_occupancy(request: HttpRequest):
+    """
+    6자리 방 코드 사용 현황 (allocated, capacity, occupancy)
+
+    운영 지표이므로 관리자 페이지에 로그인한 스태프만 조회할 수 있다.
+    """
+    return Response(await room_manager.room_code_occupancy())
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SentenceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sentence"
+
+    def ready(self):
+        from sentence import signals  # noqa: F401
@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    응답을 결정하는 값들로 강한 ETag 생성
+
+    문장세트 내용 버전, 좋아요 수, 리더보드 버전처럼 공용인 값과 유저별 값
+    (유저 ID, 좋아요 여부)을 따로 넘겨서, 한쪽이 바뀌어도 다른 쪽 때문에
+    캐시가 무효화되지 않도록 한다.
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16)
+    return quote_etag(digest.hexdigest())
+
+
+def not_modified(
+    request: HttpRequest, etag: str, last_modified: Optional[datetime]
+) -> Optional[HttpResponseBase]:
+    """If-None-Match / If-Modified-Since가 맞으면 직렬화 전에 304 응답을 돌려준다"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(
+    response: HttpResponseBase, etag: str, last_modified: Optional[datetime]
+) -> HttpResponseBase:
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # 로그인 유저마다 좋아요 여부와 순위가 달라지므로 공유 캐시에는 두지 않는다
+    patch_vary_headers(response, ["X-Login-Code"])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
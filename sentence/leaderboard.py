@@ -0,0 +1,226 @@
+import time
+from functools import cached_property
+from typing import ClassVar, Optional
+
+import redis.asyncio as aioredis
+from django.db.models import QuerySet
+from django_redis import get_redis_connection
+from redis import Redis
+from redis.commands.core import Script
+
+from danso.redis_client import get_async_redis
+from sentence.models import SentenceLeaderboard
+
+# KEYS = 점수 sorted set, 닉네임 해시, 적재 표시 키, 버전 키
+# ARGV = player_id, score, nickname, 현재 시각(ms), 키 TTL
+# 적재되지 않은 리더보드에도 항상 반영한다. 적재가 Postgres를 읽은 뒤에 들어온
+# 점수도 적재할 때 GT로 합쳐지므로 사라지지 않는다.
+SUBMIT_SCRIPT = """
+local changed = redis.call('ZADD', KEYS[1], 'GT', 'CH', ARGV[2], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+for i = 1, 2 do
+    if redis.call('TTL', KEYS[i]) < 0 then
+        redis.call('EXPIRE', KEYS[i], ARGV[5])
+    end
+end
+if changed > 0 and redis.call('EXISTS', KEYS[3]) == 1 then
+    local version = tonumber(redis.call('GET', KEYS[4]) or '0')
+    redis.call('SET', KEYS[4], math.max(version + 1, tonumber(ARGV[4])), 'KEEPTTL')
+end
+return changed
+"""
+
+# KEYS = SUBMIT_SCRIPT와 같음, ARGV = player_id
+REMOVE_SCRIPT = """
+local removed = redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if removed > 0 and redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('INCR', KEYS[4])
+end
+return removed
+"""
+
+
+class LeaderboardEngine:
+    """
+    문장세트별 리더보드를 Redis sorted set으로 관리
+
+    SentenceLeaderboard 테이블을 그대로 비추며, 상위 N명, 내 순위,
+    내 앞뒤 k명을 모두 O(log n)으로 조회한다. 점수는 update_sentence_game_point
+    에서 바로 반영하고, Redis에 없는 리더보드는 첫 조회 때 Postgres에서 적재한다.
+    점수 반영은 DB 스레드와 시그널에서 동기 클라이언트로, 조회와 적재는 요청의
+    이벤트 루프에서 비동기 클라이언트로 한다.
+    """
+
+    KEY_PREFIX: ClassVar[str] = "leaderboard:"
+    TTL: ClassVar[int] = 60 * 60 * 24
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @cached_property
+    def redis(self) -> Redis:
+        return get_redis_connection(self.alias)
+
+    @property
+    def aredis(self) -> aioredis.Redis:
+        return get_async_redis()
+
+    @cached_property
+    def _submit(self) -> Script:
+        return self.redis.register_script(SUBMIT_SCRIPT)
+
+    @cached_property
+    def _remove(self) -> Script:
+        return self.redis.register_script(REMOVE_SCRIPT)
+
+    def _keys(self, pack_id: int) -> tuple[str, str, str]:
+        prefix = f"{self.KEY_PREFIX}{pack_id}"
+        return f"{prefix}:scores", f"{prefix}:names", f"{prefix}:loaded"
+
+    def _version_key(self, pack_id: int) -> str:
+        return f"{self.KEY_PREFIX}{pack_id}:version"
+
+    async def _version(self, pack_id: int) -> Optional[int]:
+        version = await self.aredis.get(self._version_key(pack_id))
+        return int(version) if version is not None else None
+
+    async def aversion(self, pack_id: int) -> int:
+        """
+        리더보드가 마지막으로 바뀐 시각(ms)
+
+        점수가 바뀔 때마다 증가하며 다시 적재하면 적재 시각으로 초기화되므로,
+        Redis가 비워진 뒤에도 예전 값과 겹치지 않는다. 적재 전이면 먼저 적재한다
+        """
+        version = await self._version(pack_id)
+        if version is None:
+            await self.arebuild(pack_id)
+            version = await self._version(pack_id)
+        return version
+
+    def _rows(self, pack_id: int) -> QuerySet:
+        return SentenceLeaderboard.objects.filter(sentence_pack_id=pack_id).values_list(
+            "player_id", "score", "player__nickname"
+        )
+
+    async def arebuild(self, pack_id: int) -> None:
+        """Postgres의 SentenceLeaderboard로 리더보드를 다시 적재"""
+        rows = [row async for row in self._rows(pack_id)]
+        scores_key, names_key, loaded_key = self._keys(pack_id)
+
+        # 지우지 않고 GT로 합친다. 위에서 읽은 뒤 submit된 더 높은 점수가 남는다
+        async with self.aredis.pipeline() as pipe:
+            if rows:
+                pipe.zadd(
+                    scores_key,
+                    {player_id: score for player_id, score, _ in rows},
+                    gt=True,
+                )
+                pipe.hset(
+                    names_key,
+                    mapping={
+                        player_id: nickname or "" for player_id, _, nickname in rows
+                    },
+                )
+            pipe.expire(scores_key, self.TTL)
+            pipe.expire(names_key, self.TTL)
+            pipe.set(loaded_key, 1, ex=self.TTL)
+            pipe.set(
+                self._version_key(pack_id), time.time_ns() // 1_000_000, ex=self.TTL
+            )
+            await pipe.execute()
+
+    def submit(self, pack_id: int, player_id: int, nickname: str, score: int) -> None:
+        """최고 점수 반영 (기존 점수보다 높을 때만 갱신)"""
+        self._submit(
+            keys=[*self._keys(pack_id), self._version_key(pack_id)],
+            args=[
+                player_id,
+                score,
+                nickname or "",
+                time.time_ns() // 1_000_000,
+                self.TTL,
+            ],
+        )
+
+    def remove(self, pack_id: int, player_id: int) -> None:
+        self._remove(
+            keys=[*self._keys(pack_id), self._version_key(pack_id)], args=[player_id]
+        )
+
+    async def _entries(
+        self, pack_id: int, members: list[tuple[bytes, float]]
+    ) -> list[dict]:
+        if not members:
+            return []
+        _, names_key, _ = self._keys(pack_id)
+        names = await self.aredis.hmget(names_key, [member for member, _ in members])
+        return [
+            {
+                "player_id": int(member),
+                "nickname": name.decode("utf-8") if name else None,
+                "score": int(score),
+            }
+            for (member, score), name in zip(members, names)
+        ]
+
+    async def _summary(
+        self, pack_id: int, player_id: int, top_n: int, k: int
+    ) -> Optional[dict]:
+        scores_key, _, loaded_key = self._keys(pack_id)
+
+        async with self.aredis.pipeline(transaction=False) as pipe:
+            pipe.exists(loaded_key)
+            pipe.zrevrange(scores_key, 0, top_n - 1, withscores=True)
+            pipe.zcard(scores_key)
+            pipe.zscore(scores_key, player_id)
+            pipe.zrevrank(scores_key, player_id)
+            loaded, top, count, my_score, my_index = await pipe.execute()
+        if not loaded:
+            return None
+
+        if my_score is not None:
+            async with self.aredis.pipeline(transaction=False) as pipe:
+                pipe.zcount(scores_key, f"({my_score}", "+inf")
+                pipe.zrevrange(
+                    scores_key, max(0, my_index - k), my_index - 1, withscores=True
+                )
+                pipe.zrevrange(scores_key, my_index + 1, my_index + k, withscores=True)
+                higher, above, below = await pipe.execute()
+            my_rank = higher + 1
+        else:
+            # 기록이 없으면 꼴찌 다음 순위
+            above = await self.aredis.zrevrange(
+                scores_key, max(0, count - k), count - 1, withscores=True
+            )
+            below = []
+            my_rank = count + 1
+
+        return {
+            "top": await self._entries(pack_id, top),
+            "my_score": int(my_score) if my_score is not None else 0,
+            "my_rank": my_rank,
+            "above": await self._entries(pack_id, above),
+            "below": await self._entries(pack_id, below),
+        }
+
+    async def asummary(
+        self, pack_id: int, player_id: int, top_n: int = 5, k: int = 1
+    ) -> dict:
+        """
+        상위 N명, 내 점수와 순위, 내 앞뒤 k명 조회
+
+        같은 점수는 같은 순위로 본다 (나보다 점수가 높은 사람 수 + 1).
+        리더보드가 아직 적재되지 않았다면 먼저 적재한다.
+
+        Returns:
+            {"top", "my_score", "my_rank", "above", "below"} 형태의 dict
+        """
+        summary = await self._summary(pack_id, player_id, top_n, k)
+        if summary is None:
+            await self.arebuild(pack_id)
+            summary = await self._summary(pack_id, player_id, top_n, k)
+        return summary
+
+
+leaderboard_engine = LeaderboardEngine()
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from sentence.models import SentencePack, SentencePackLike
+
+
+class Command(BaseCommand):
+    help = "SentencePack.like_count를 실제 좋아요 수로 다시 계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="수정하지 않고 값이 어긋난 문장세트 수만 출력합니다.",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = (
+            SentencePack.objects.order_by()
+            .annotate(actual=Count("likes"))
+            .exclude(like_count=F("actual"))
+            .values_list("id", flat=True)
+        )
+        pack_ids = list(mismatched)
+
+        if options["dry_run"] or not pack_ids:
+            self.stdout.write(f"좋아요 수가 어긋난 문장세트: {len(pack_ids)}개")
+            return
+
+        likes = (
+            SentencePackLike.objects.filter(pack=OuterRef("pk"))
+            .order_by()
+            .values("pack")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        repaired = SentencePack.objects.filter(id__in=pack_ids).update(
+            like_count=Coalesce(Subquery(likes), 0)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"문장세트 {repaired}개의 좋아요 수를 수정했습니다.")
+        )
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0005_rename_total_score_sentenceleaderboard_score"),
+        ("user", "0006_gameuser_token_version"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="sentencepack",
+            options={
+                "ordering": ["-created_at"],
+                "verbose_name": "문장세트",
+                "verbose_name_plural": "문장세트들",
+            },
+        ),
+        migrations.AddField(
+            model_name="sentencepack",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="SentencePackLike",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="좋아요 누른 시각"
+                    ),
+                ),
+                (
+                    "pack",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes",
+                        to="sentence.sentencepack",
+                        verbose_name="좋아요 받은 게시글",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="likes_given",
+                        to="user.gameuser",
+                        verbose_name="좋아요 누른 사용자",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "좋아요",
+                "verbose_name_plural": "좋아요들",
+                "ordering": ["-created_at"],
+                "unique_together": {("user", "pack")},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_count(apps, schema_editor):
+    SentencePack = apps.get_model("sentence", "SentencePack")
+    SentencePackLike = apps.get_model("sentence", "SentencePackLike")
+    likes = (
+        SentencePackLike.objects.filter(pack=OuterRef("pk"))
+        .order_by()
+        .values("pack")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    SentencePack.objects.update(like_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0006_sentencepack_created_at_sentencepacklike"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sentencepack",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_count, migrations.RunPython.noop),
+    ]
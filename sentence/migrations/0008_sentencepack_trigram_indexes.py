@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:10
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0007_sentencepack_like_count"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="sentencepack",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="gin_trgm_ops",
+                ),
+                name="sentencepack_name_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sentencepack",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("original_author"),
+                    name="gin_trgm_ops",
+                ),
+                name="sentencepack_orig_author_trgm",
+            ),
+        ),
+    ]
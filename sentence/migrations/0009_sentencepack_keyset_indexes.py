@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0008_sentencepack_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sentencepack",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="sentencepack_created_id"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sentencepack",
+            index=models.Index(
+                fields=["level", "-created_at", "-id"],
+                name="sentencepack_level_created_id",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+# 이 시점의 sentence.models.parse_sentences 사본.
+# 이후 모델 쪽 함수가 바뀌어도 이 마이그레이션의 결과는 바뀌지 않아야 한다.
+SENTENCE_SEPARATOR = "\r\n"
+
+
+def parse_sentences(text: str) -> dict:
+    texts = text.split(SENTENCE_SEPARATOR)
+    lengths = [len(sentence) for sentence in texts]
+    character_counts = [
+        sum(1 for char in sentence if not char.isspace()) for sentence in texts
+    ]
+    return {
+        "texts": texts,
+        "lengths": lengths,
+        "character_counts": character_counts,
+        "sentence_count": len(texts),
+        "total_length": sum(lengths),
+        "total_characters": sum(character_counts),
+    }
+
+
+def backfill_parsed_sentences(apps, schema_editor):
+    SentencePack = apps.get_model("sentence", "SentencePack")
+    packs = list(SentencePack.objects.only("id", "sentences"))
+    for pack in packs:
+        pack.parsed_sentences = parse_sentences(pack.sentences)
+    SentencePack.objects.bulk_update(packs, ["parsed_sentences"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0009_sentencepack_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sentencepack",
+            name="parsed_sentences",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_parsed_sentences, migrations.RunPython.noop),
+    ]
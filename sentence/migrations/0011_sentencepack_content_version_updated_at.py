@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sentence", "0010_sentencepack_parsed_sentences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sentencepack",
+            name="content_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name="sentencepack",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -1,8 +1,36 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from rest_framework.relations import ManyRelatedField
 
 from user.models import GameUser  # User 모델 import
 
+SENTENCE_SEPARATOR = "\r\n"
+
+
+def parse_sentences(text: str) -> dict:
+    """
+    줄 단위 문장 텍스트를 게임에서 바로 쓸 수 있는 형태로 변환
+
+    Returns:
+        {"texts": [문장], "lengths": [글자 수], "character_counts": [공백 제외 글자 수],
+         "sentence_count", "total_length", "total_characters"}
+    """
+    texts = text.split(SENTENCE_SEPARATOR)
+    lengths = [len(sentence) for sentence in texts]
+    character_counts = [
+        sum(1 for char in sentence if not char.isspace()) for sentence in texts
+    ]
+    return {
+        "texts": texts,
+        "lengths": lengths,
+        "character_counts": character_counts,
+        "sentence_count": len(texts),
+        "total_length": sum(lengths),
+        "total_characters": sum(character_counts),
+    }
+
+
 class SentencePack(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
@@ -13,6 +41,8 @@ class SentencePack(models.Model):
         GameUser, on_delete=models.CASCADE, related_name="sentences"
     )
     sentences = models.TextField()
+    # 저장할 때 sentences를 미리 나눠 둔 값 (parse_sentences 참고)
+    parsed_sentences = models.JSONField(default=dict, editable=False)
     LEVEL_CHOICES = [
         ("A", "상"),
         ("B", "중상"),
@@ -22,16 +52,52 @@ class SentencePack(models.Model):
     ]
 
     level = models.CharField(max_length=1, choices=LEVEL_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # 좋아요 수 변경까지 포함한 마지막 수정 시각 (Last-Modified)
+    updated_at = models.DateTimeField(auto_now=True)
+    # 제목, 문장 등 내용이 저장될 때마다 증가 (ETag)
+    content_version = models.PositiveIntegerField(default=1, editable=False)
+    # SentencePackLike 추가/삭제와 같은 트랜잭션에서 갱신되는 좋아요 수
+    like_count = models.PositiveIntegerField(default=0)
     likes: ManyRelatedField["SentencePackLike"]
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     class Meta:
         verbose_name = "문장세트"
         verbose_name_plural = "문장세트들"
         ordering = ['-created_at']
+        indexes = [
+            # 목록 키셋 페이지네이션 (created_at, id) 내림차순
+            models.Index(fields=["-created_at", "-id"], name="sentencepack_created_id"),
+            models.Index(
+                fields=["level", "-created_at", "-id"],
+                name="sentencepack_level_created_id",
+            ),
+            # 검색용 pg_trgm 인덱스. icontains가 UPPER(...) LIKE로 바뀌므로 UPPER 식에 건다
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="sentencepack_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("original_author"), name="gin_trgm_ops"),
+                name="sentencepack_orig_author_trgm",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.parsed_sentences = parse_sentences(self.sentences)
+        if not self._state.adding:
+            self.content_version += 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = {"content_version", "updated_at"}
+            if "sentences" in update_fields:
+                derived.add("parsed_sentences")
+            kwargs["update_fields"] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
 
     def get_level_display_korean(self):
         return dict(self.LEVEL_CHOICES).get(self.level, "")
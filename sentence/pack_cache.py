@@ -0,0 +1,159 @@
+import json
+import logging
+from threading import Lock
+from typing import Any, ClassVar, Optional
+
+from django.db.models import QuerySet
+from django_redis import get_redis_connection
+from redis import Redis
+
+from danso.redis_client import get_async_redis
+from sentence.models import SentencePack
+from user.login_cache import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+# KEYS = 문장세트 캐시 키, 무효화 횟수 키
+# ARGV = DB 조회 전에 읽은 무효화 횟수, 캐시 TTL, 데이터
+# DB를 읽는 동안 invalidate가 있었다면 읽은 데이터가 이전 값일 수 있으므로 저장하지 않는다
+STORE_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[2])
+return 1
+"""
+
+
+class SentencePackCache:
+    """
+    문장세트 응답 데이터 캐시
+
+    프로세스 내 LRU -> Redis -> DB 순서로 조회한다. 문장세트가 저장/삭제되거나
+    좋아요 수가 바뀌면 invalidate가 Redis 키를 지우고 pub/sub으로 알려서,
+    모든 워커가 자기 LRU에서 해당 문장세트를 바로 지운다. 알림을 놓친 경우를
+    대비해 LRU 항목에도 짧은 TTL을 둔다. invalidate는 문장세트별 무효화 횟수도
+    올리며, DB를 읽는 사이 횟수가 바뀐 조회 결과는 Redis에 채우지 않는다.
+    """
+
+    KEY_PREFIX: ClassVar[str] = "sentence_pack:"
+    CHANNEL: ClassVar[str] = "sentence_pack:invalidate"
+    REDIS_TTL: ClassVar[int] = 600
+    GENERATION_TTL: ClassVar[int] = 60 * 60 * 24
+    LOCAL_TTL: ClassVar[float] = 60.0
+    LOCAL_MAXSIZE: ClassVar[int] = 1024
+
+    _local: ClassVar[LocalTTLCache] = LocalTTLCache(LOCAL_MAXSIZE, LOCAL_TTL)
+    _listener: ClassVar[Optional[Any]] = None
+    _listener_lock: ClassVar[Lock] = Lock()
+
+    @classmethod
+    def _redis(cls) -> Redis:
+        return get_redis_connection("default")
+
+    @classmethod
+    def _key(cls, pack_id: int) -> str:
+        return f"{cls.KEY_PREFIX}{pack_id}"
+
+    @classmethod
+    def _generation_key(cls, pack_id: int) -> str:
+        return f"{cls.KEY_PREFIX}{pack_id}:generation"
+
+    @classmethod
+    def _on_invalidate(cls, message: dict) -> None:
+        cls._local.pop(int(message["data"]))
+
+    @classmethod
+    def _on_listener_error(cls, error: Exception, pubsub, thread) -> None:
+        # 구독이 끊긴 동안의 알림은 받을 수 없으므로 LRU를 비우고 다음 조회 때 다시 구독
+        logger.warning("sentence pack invalidation listener stopped: %s", error)
+        thread.stop()
+        pubsub.close()
+        with cls._listener_lock:
+            cls._listener = None
+        cls._local.clear()
+
+    @classmethod
+    def _ensure_listener(cls) -> None:
+        if cls._listener is not None:
+            return
+        with cls._listener_lock:
+            if cls._listener is not None:
+                return
+            pubsub = cls._redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{cls.CHANNEL: cls._on_invalidate})
+            cls._listener = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=cls._on_listener_error,
+            )
+        # 구독하기 전에 채워진 항목은 알림을 못 받았을 수 있다
+        cls._local.clear()
+
+    @staticmethod
+    def build_payload(sentence_pack: SentencePack) -> dict:
+        return {
+            "id": sentence_pack.id,
+            "name": sentence_pack.name,
+            "author": sentence_pack.author.nickname if sentence_pack.author else None,
+            "original_author": sentence_pack.original_author,
+            "level": sentence_pack.level,
+            "parsed_sentences": sentence_pack.parsed_sentences,
+            "like_count": sentence_pack.like_count,
+            "content_version": sentence_pack.content_version,
+            "updated_at": sentence_pack.updated_at.isoformat(),
+        }
+
+    @classmethod
+    def _queryset(cls) -> QuerySet[SentencePack]:
+        return SentencePack.objects.select_related("author").defer("sentences")
+
+    @classmethod
+    async def aget(cls, pack_id: int) -> Optional[dict]:
+        """
+        문장세트 응답 데이터 조회
+
+        Returns:
+            build_payload 형태의 dict, 문장세트가 없으면 None
+        """
+        cls._ensure_listener()
+        payload = cls._local.get(pack_id)
+        if payload is not None:
+            return payload
+
+        redis = get_async_redis()
+        key, generation_key = cls._key(pack_id), cls._generation_key(pack_id)
+        raw, generation = await redis.mget(key, generation_key)
+        if raw is not None:
+            payload = json.loads(raw)
+        else:
+            try:
+                sentence_pack = await cls._queryset().aget(id=pack_id)
+            except SentencePack.DoesNotExist:
+                return None
+            payload = cls.build_payload(sentence_pack)
+            stored = await redis.register_script(STORE_SCRIPT)(
+                keys=[key, generation_key],
+                args=[
+                    int(generation or 0),
+                    cls.REDIS_TTL,
+                    json.dumps(payload, ensure_ascii=False),
+                ],
+            )
+            if not stored:
+                # 조회 중에 바뀐 문장세트다. 이번 응답에만 쓰고 캐시하지 않는다
+                return payload
+        cls._local.set(pack_id, payload)
+        return payload
+
+    @classmethod
+    def invalidate(cls, pack_id: int) -> None:
+        """문장세트가 바뀌거나 삭제될 때 호출 (모든 워커의 LRU에서 제거)"""
+        redis = cls._redis()
+        pipe = redis.pipeline()
+        pipe.incr(cls._generation_key(pack_id))
+        pipe.expire(cls._generation_key(pack_id), cls.GENERATION_TTL)
+        pipe.delete(cls._key(pack_id))
+        pipe.execute()
+        cls._local.pop(pack_id)
+        redis.publish(cls.CHANNEL, pack_id)
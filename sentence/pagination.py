@@ -0,0 +1,96 @@
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Model, Q, QuerySet
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CURSOR_SALT = "sentence.pagination.cursor"
+
+
+class KeysetPage(NamedTuple):
+    items: list[Model]
+    next_cursor: Optional[str]
+
+
+def get_page_size(value: Optional[str]) -> int:
+    """limit 쿼리 파라미터를 1 ~ MAX_PAGE_SIZE 범위의 페이지 크기로 변환"""
+    if value is None:
+        return PAGE_SIZE
+    try:
+        page_size = int(value)
+    except ValueError:
+        raise ValueError("limit은 1 이상의 정수여야 합니다.")
+    if page_size < 1:
+        raise ValueError("limit은 1 이상의 정수여야 합니다.")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(ordering: tuple[str, ...], item: Model) -> str:
+    values = []
+    for field in ordering:
+        value = getattr(item, field)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return signing.dumps({"o": list(ordering), "v": values}, salt=CURSOR_SALT)
+
+
+def decode_cursor(
+    queryset: QuerySet, ordering: tuple[str, ...], cursor: str
+) -> list[Any]:
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValueError("잘못된 커서입니다.")
+    # 다른 정렬 기준(예: 검색 결과)에서 발급한 커서는 받지 않는다
+    if data.get("o") != list(ordering) or len(data.get("v", [])) != len(ordering):
+        raise ValueError("잘못된 커서입니다.")
+
+    values = []
+    for field, value in zip(ordering, data["v"]):
+        try:
+            value = queryset.model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            # 검색 유사도처럼 annotate된 값은 그대로 비교
+            pass
+        except ValidationError:
+            raise ValueError("잘못된 커서입니다.")
+        values.append(value)
+    return values
+
+
+async def paginate(
+    queryset: QuerySet,
+    ordering: tuple[str, ...],
+    cursor: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> KeysetPage:
+    """
+    키셋(커서) 페이지네이션
+
+    ordering의 모든 필드를 내림차순으로 정렬하고, 커서에 담긴 마지막 항목의
+    값보다 뒤에 있는 항목만 읽는다. OFFSET과 달리 몇 번째 페이지든 인덱스를
+    따라 page_size + 1개만 읽는다. ordering의 마지막 필드는 유일해야 한다.
+
+    Raises:
+        ValueError: 커서가 위조되었거나 다른 정렬 기준에서 발급된 경우
+    """
+    if cursor:
+        values = decode_cursor(queryset, ordering, cursor)
+        # (a, b) < (x, y)  ==  a < x OR (a = x AND b < y)
+        after = Q()
+        for index, field in enumerate(ordering):
+            condition = Q(**{f"{field}__lt": values[index]})
+            for previous, value in zip(ordering[:index], values[:index]):
+                condition &= Q(**{previous: value})
+            after |= condition
+        queryset = queryset.filter(after)
+
+    ordered = queryset.order_by(*[f"-{field}" for field in ordering])
+    items = [item async for item in ordered[: page_size + 1]]
+    if len(items) <= page_size:
+        return KeysetPage(items, None)
+
+    items = items[:page_size]
+    return KeysetPage(items, encode_cursor(ordering, items[-1]))
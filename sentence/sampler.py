@@ -0,0 +1,153 @@
+import random
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import ClassVar, Optional
+
+from sentence.models import SentencePack
+from sentence.pack_cache import SentencePackCache
+
+
+class IdPool:
+    """O(1) 추가/삭제와 O(k) 무작위 추출이 가능한 ID 배열"""
+
+    def __init__(self):
+        self._ids: list[int] = []
+        self._positions: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, item_id: int) -> None:
+        if item_id in self._positions:
+            return
+        self._positions[item_id] = len(self._ids)
+        self._ids.append(item_id)
+
+    def remove(self, item_id: int) -> None:
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return
+        # 마지막 원소를 빈 자리로 옮겨 배열을 당기지 않는다
+        last_id = self._ids.pop()
+        if last_id != item_id:
+            self._ids[position] = last_id
+            self._positions[last_id] = position
+
+    def sample(self, k: int) -> list[int]:
+        return random.sample(self._ids, min(k, len(self._ids)))
+
+
+class SentencePackSampler:
+    """
+    ORDER BY RANDOM() 없이 문장세트를 무작위로 뽑는 샘플러
+
+    워커마다 문장세트 ID 배열(전체 + 레벨별)을 메모리에 두고, 모델 시그널로
+    추가/삭제를 반영한다. 다른 워커에서 생긴 변경은 RELOAD_INTERVAL마다
+    전체를 다시 읽어 맞추며, 그 사이 삭제된 ID는 조회 시 걸러낸다.
+    """
+
+    RELOAD_INTERVAL: ClassVar[int] = 300
+
+    def __init__(self):
+        self._all = IdPool()
+        self._by_level: defaultdict[str, IdPool] = defaultdict(IdPool)
+        self._levels: dict[int, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = Lock()
+
+    async def areload(self) -> None:
+        rows = SentencePack.objects.order_by().values_list("id", "level")
+        self._replace([row async for row in rows])
+
+    def _replace(self, rows: list[tuple[int, str]]) -> None:
+        with self._lock:
+            self._all = IdPool()
+            self._by_level = defaultdict(IdPool)
+            self._levels = {}
+            for pack_id, level in rows:
+                self._add(pack_id, level)
+            self._loaded_at = time.monotonic()
+
+    def _needs_reload(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.RELOAD_INTERVAL
+        )
+
+    async def _aensure_loaded(self) -> None:
+        if self._needs_reload():
+            await self.areload()
+
+    def _add(self, pack_id: int, level: str) -> None:
+        previous_level = self._levels.get(pack_id)
+        if previous_level is not None and previous_level != level:
+            self._by_level[previous_level].remove(pack_id)
+        self._levels[pack_id] = level
+        self._all.add(pack_id)
+        self._by_level[level].add(pack_id)
+
+    def add(self, pack_id: int, level: str) -> None:
+        """문장세트가 추가되거나 레벨이 바뀌었을 때 호출"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._add(pack_id, level)
+
+    def remove(self, pack_id: int) -> None:
+        """문장세트가 삭제되었을 때 호출"""
+        with self._lock:
+            level = self._levels.pop(pack_id, None)
+            self._all.remove(pack_id)
+            if level is not None:
+                self._by_level[level].remove(pack_id)
+
+    async def asample_ids(self, k: int, level: Optional[str] = None) -> list[int]:
+        await self._aensure_loaded()
+        with self._lock:
+            pool = self._all if level is None else self._by_level.get(level)
+            return pool.sample(k) if pool else []
+
+    async def asample(self, k: int, level: Optional[str] = None) -> list[SentencePack]:
+        """
+        문장세트를 무작위로 k개 조회
+
+        Args:
+            k: 뽑을 개수
+            level: 지정하면 해당 레벨에서만 뽑는다
+
+        Returns:
+            author가 함께 조회된 SentencePack 목록 (최대 k개)
+        """
+        pack_ids = await self.asample_ids(k, level)
+        if not pack_ids:
+            return []
+        return self._ordered(pack_ids, await self._queryset().ain_bulk(pack_ids))
+
+    @staticmethod
+    def _queryset():
+        return SentencePack.objects.select_related("author").defer("sentences")
+
+    def _ordered(
+        self, pack_ids: list[int], packs: dict[int, SentencePack]
+    ) -> list[SentencePack]:
+        for missing_id in set(pack_ids) - packs.keys():
+            self.remove(missing_id)
+        return [packs[pack_id] for pack_id in pack_ids if pack_id in packs]
+
+    async def apick_payload(self, level: Optional[str] = None) -> Optional[dict]:
+        """
+        랜덤 문장세트 하나를 SentencePackCache 데이터로 반환
+
+        자주 뽑히는 문장세트는 LRU에서 바로 꺼내므로 DB를 거치지 않는다.
+        """
+        while True:
+            pack_ids = await self.asample_ids(1, level)
+            if not pack_ids:
+                return None
+            payload = await SentencePackCache.aget(pack_ids[0])
+            if payload is not None:
+                return payload
+            self.remove(pack_ids[0])
+
+
+sentence_pack_sampler = SentencePackSampler()
@@ -0,0 +1,110 @@
+from typing import Iterable
+
+from django.db import connection
+
+from danso.db import run_in_db_thread
+from sentence.leaderboard import leaderboard_engine
+from sentence.models import SentenceLeaderboard
+from user.models import GameUser
+
+# 기존 점수보다 높을 때만 갱신하고, 실제로 쓰인 행만 돌려준다
+UPSERT_SQL = """
+INSERT INTO {table} (sentence_pack_id, player_id, score)
+VALUES {values}
+ON CONFLICT (sentence_pack_id, player_id)
+DO UPDATE SET score = EXCLUDED.score
+WHERE {table}.score < EXCLUDED.score
+RETURNING sentence_pack_id, player_id, score
+"""
+
+
+def upsert_scores(scores: list[tuple[int, int, int]]) -> list[tuple[int, int, int]]:
+    """
+    (문장세트 ID, 플레이어 ID, 점수) 목록을 한 번의 쿼리로 반영
+
+    Returns:
+        최고 점수가 새로 기록된 (문장세트 ID, 플레이어 ID, 점수) 목록
+    """
+    if not scores:
+        return []
+
+    table = connection.ops.quote_name(SentenceLeaderboard._meta.db_table)
+    sql = UPSERT_SQL.format(
+        table=table, values=", ".join(["(%s, %s, %s)"] * len(scores))
+    )
+    params = [value for row in scores for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def parse_score(value: str) -> int:
+    """
+    제출된 점수 문자열을 점수 컬럼에 들어갈 수 있는 정수로 변환
+
+    Raises:
+        ValueError: 정수가 아니거나 점수 컬럼 범위를 벗어난 경우
+    """
+    try:
+        score = int(value)
+    except ValueError:
+        raise ValueError("점수는 정수여야 합니다.")
+    min_score, max_score = connection.ops.integer_field_range(
+        SentenceLeaderboard._meta.get_field("score").get_internal_type()
+    )
+    if not min_score <= score <= max_score:
+        raise ValueError("점수가 허용 범위를 벗어났습니다.")
+    return score
+
+
+def submit_score(sentence_pack_id: int, user: GameUser, score: int) -> bool:
+    """
+    게임 점수 제출
+
+    Returns:
+        최고 점수가 갱신되었는지 여부
+    """
+    if not upsert_scores([(sentence_pack_id, user.id, score)]):
+        return False
+    leaderboard_engine.submit(sentence_pack_id, user.id, user.nickname, score)
+    return True
+
+
+def bulk_submit_scores(
+    scores: Iterable[tuple[int, int, int]],
+) -> list[tuple[int, int, int]]:
+    """
+    대전이 끝났을 때 여러 점수를 한꺼번에 제출 (동기 DB 함수)
+
+    같은 (문장세트, 플레이어)가 여러 번 들어오면 가장 높은 점수만 쓴다.
+    ON CONFLICT DO UPDATE는 한 쿼리에서 같은 행을 두 번 갱신할 수 없다.
+    닉네임 조회도 동기 ORM이므로 이벤트 루프에서는 abulk_submit_scores를 쓴다.
+
+    Returns:
+        최고 점수가 새로 기록된 (문장세트 ID, 플레이어 ID, 점수) 목록
+    """
+    best: dict[tuple[int, int], int] = {}
+    for sentence_pack_id, player_id, score in scores:
+        key = (sentence_pack_id, player_id)
+        if key not in best or best[key] < score:
+            best[key] = score
+
+    updated = upsert_scores([(*key, score) for key, score in best.items()])
+    if updated:
+        nicknames = dict(
+            GameUser.objects.filter(
+                id__in={player_id for _, player_id, _ in updated}
+            ).values_list("id", "nickname")
+        )
+        for sentence_pack_id, player_id, score in updated:
+            leaderboard_engine.submit(
+                sentence_pack_id, player_id, nicknames.get(player_id), score
+            )
+    return updated
+
+
+async def abulk_submit_scores(
+    scores: Iterable[tuple[int, int, int]],
+) -> list[tuple[int, int, int]]:
+    """bulk_submit_scores를 DB 전용 스레드에서 실행"""
+    return await run_in_db_thread(bulk_submit_scores, list(scores))
@@ -0,0 +1,70 @@
+from typing import Optional
+
+from django.db.models import QuerySet
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest, Upper
+
+from sentence.models import SentencePack
+
+CATALOG_ORDERING = ("created_at", "id")
+RELEVANCE_ORDERING = ("rank", "created_at", "id")
+
+
+def search_sentence_packs(
+    keyword: Optional[str] = None,
+    level: Optional[str] = None,
+    author: Optional[str] = None,
+) -> tuple[QuerySet[SentencePack], tuple[str, ...]]:
+    """
+    문장세트 검색
+
+    검색어는 제목과 원작자에서, 저자는 닉네임에서 찾는다. 모두 pg_trgm GIN
+    인덱스를 타므로 부분 일치(ILIKE)와 오타가 섞인 단어 유사도 검색이 전체
+    스캔 없이 처리된다. 주어진 조건은 모두 AND로 묶는다.
+
+    Returns:
+        (queryset, 키셋 정렬 기준). 검색어나 저자가 있으면 유사도 순,
+        레벨만 있으면 목록과 같은 최신순
+    """
+    # icontains와 같은 UPPER 식을 써야 같은 인덱스 하나로 두 조건을 모두 처리한다
+    queryset = SentencePack.objects.select_related("author").alias(
+        name_upper=Upper("name"),
+        original_author_upper=Upper("original_author"),
+        author_nickname_upper=Upper("author__nickname"),
+    )
+    relevance = []
+
+    if keyword:
+        queryset = queryset.filter(
+            Q(name__icontains=keyword)
+            | Q(name_upper__trigram_word_similar=keyword)
+            | Q(original_author__icontains=keyword)
+            | Q(original_author_upper__trigram_word_similar=keyword)
+        )
+        # 원작자가 비어 있으면 GREATEST가 NULL을 건너뛴다
+        relevance.append(
+            Greatest(
+                TrigramWordSimilarity(keyword, "name"),
+                TrigramWordSimilarity(keyword, "original_author"),
+            )
+        )
+    if author:
+        queryset = queryset.filter(
+            Q(author__nickname__icontains=author)
+            | Q(author_nickname_upper__trigram_word_similar=author)
+        )
+        relevance.append(TrigramWordSimilarity(author, "author__nickname"))
+    if level:
+        queryset = queryset.filter(level=level)
+
+    if not relevance:
+        return queryset, CATALOG_ORDERING
+
+    rank = relevance[0]
+    for expression in relevance[1:]:
+        rank = rank + expression
+    # 유사도는 real(float4)이라 커서에 담긴 파이썬 float(float8)와 같다고 비교되지
+    # 않는다. double precision으로 맞춰야 키셋 경계에서 동점 행을 건너뛰지 않는다
+    return queryset.annotate(rank=Cast(rank, FloatField())), RELEVANCE_ORDERING
@@ -0,0 +1,53 @@
+from typing import Iterable, Optional
+
+from sentence.models import SentencePack, SentencePackLike
+from user.models import GameUser
+
+
+async def get_liked_pack_ids(
+    user: Optional[GameUser], packs: Iterable[SentencePack]
+) -> set[int]:
+    """주어진 문장세트 중 유저가 좋아요한 것의 ID를 쿼리 한 번으로 조회"""
+    return await filter_liked_pack_ids(user, [pack.id for pack in packs])
+
+
+async def filter_liked_pack_ids(
+    user: Optional[GameUser], pack_ids: list[int]
+) -> set[int]:
+    """get_liked_pack_ids와 같지만 문장세트 ID 목록을 받는다"""
+    if user is None or not pack_ids:
+        return set()
+
+    liked = SentencePackLike.objects.filter(user=user, pack_id__in=pack_ids)
+    return {pack_id async for pack_id in liked.values_list("pack_id", flat=True)}
+
+
+def serialize_sentence_pack(sentence: SentencePack, is_liked: bool) -> dict:
+    return {
+        "id": sentence.id,
+        "name": sentence.name,
+        "author": sentence.author.nickname if sentence.author else "Unknown",
+        "original_author": sentence.original_author,
+        "level": sentence.level,
+        "total_likes": sentence.like_count,
+        "is_liked": is_liked,
+    }
+
+
+async def serialize_sentence_packs(
+    sentences: list[SentencePack],
+    user: Optional[GameUser],
+    liked_pack_ids: Optional[set[int]] = None,
+) -> list[dict]:
+    """
+    목록 응답 직렬화
+
+    페이지 크기와 관계없이 좋아요 여부를 쿼리 한 번으로 채운다.
+    이미 조회한 liked_pack_ids가 있으면 그대로 쓴다.
+    """
+    if liked_pack_ids is None:
+        liked_pack_ids = await get_liked_pack_ids(user, sentences)
+    return [
+        serialize_sentence_pack(sentence, sentence.id in liked_pack_ids)
+        for sentence in sentences
+    ]
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sentence.leaderboard import leaderboard_engine
+from sentence.models import SentenceLeaderboard, SentencePack
+from sentence.pack_cache import SentencePackCache
+from sentence.sampler import sentence_pack_sampler
+
+
+@receiver(post_save, sender=SentencePack)
+def add_sentence_pack_to_sampler(sender, instance: SentencePack, **kwargs):
+    sentence_pack_sampler.add(instance.id, instance.level)
+
+
+@receiver(post_delete, sender=SentencePack)
+def remove_sentence_pack_from_sampler(sender, instance: SentencePack, **kwargs):
+    sentence_pack_sampler.remove(instance.id)
+
+
+@receiver(post_save, sender=SentencePack)
+@receiver(post_delete, sender=SentencePack)
+def invalidate_sentence_pack_cache(sender, instance: SentencePack, **kwargs):
+    # 커밋 전에 지우면 다른 요청이 이전 값을 다시 채울 수 있다
+    pack_id = instance.id
+    transaction.on_commit(lambda: SentencePackCache.invalidate(pack_id))
+
+
+@receiver(post_delete, sender=SentenceLeaderboard)
+def remove_score_from_leaderboard(sender, instance: SentenceLeaderboard, **kwargs):
+    leaderboard_engine.remove(instance.sentence_pack_id, instance.player_id)
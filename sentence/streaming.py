@@ -0,0 +1,49 @@
+import json
+from typing import AsyncIterator, Optional
+
+from django.db.models import QuerySet
+
+from sentence.models import SentencePack
+from sentence.serializers import get_liked_pack_ids, serialize_sentence_pack
+from user.models import GameUser
+
+EXPORT_CHUNK_SIZE = 500
+
+
+async def encode_sentence_packs(
+    packs: list[SentencePack], user: Optional[GameUser]
+) -> str:
+    liked_pack_ids = await get_liked_pack_ids(user, packs)
+    return ",".join(
+        json.dumps(
+            serialize_sentence_pack(pack, pack.id in liked_pack_ids),
+            ensure_ascii=False,
+        )
+        for pack in packs
+    )
+
+
+async def stream_sentence_packs(
+    queryset: QuerySet[SentencePack],
+    user: Optional[GameUser],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[str]:
+    """
+    문장세트 목록을 JSON 배열로 조금씩 내보낸다
+
+    서버 사이드 커서에서 chunk_size개씩 읽어 좋아요 여부를 한 번에 채우고 바로
+    직렬화해 보내므로, 전체 개수와 관계없이 한 번에 메모리에 올라가는 것은
+    한 묶음뿐이다.
+    """
+    yield "["
+    separator = ""
+    batch: list[SentencePack] = []
+    async for pack in queryset.aiterator(chunk_size=chunk_size):
+        batch.append(pack)
+        if len(batch) >= chunk_size:
+            yield separator + await encode_sentence_packs(batch, user)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + await encode_sentence_packs(batch, user)
+    yield "]"
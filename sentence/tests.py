@@ -1,3 +1,271 @@
-from django.test import TestCase
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from sentence.models import SentenceLeaderboard, SentencePack
+from sentence.pagination import (
+    CURSOR_SALT,
+    MAX_PAGE_SIZE,
+    PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    get_page_size,
+    paginate,
+)
+from sentence.search import (
+    CATALOG_ORDERING,
+    RELEVANCE_ORDERING,
+    search_sentence_packs,
+)
+from sentence.sampler import SentencePackSampler
+from sentence.scores import abulk_submit_scores, bulk_submit_scores, parse_score
+from user.models import GameUser
+
+
+class KeysetCursorTests(SimpleTestCase):
+    def setUp(self):
+        self.queryset = SentencePack.objects.all()
+        self.pack = SentencePack(
+            id=42, created_at=datetime(2025, 6, 1, 12, 30, 15, 123456, timezone.utc)
+        )
+
+    def test_round_trip(self):
+        cursor = encode_cursor(CATALOG_ORDERING, self.pack)
+        self.assertEqual(
+            decode_cursor(self.queryset, CATALOG_ORDERING, cursor),
+            [self.pack.created_at, 42],
+        )
+
+    def test_round_trip_with_annotated_rank(self):
+        # 모델 필드가 아닌 검색 유사도 값은 변환 없이 그대로 돌아온다
+        self.pack.rank = 0.375
+        cursor = encode_cursor(RELEVANCE_ORDERING, self.pack)
+        self.assertEqual(
+            decode_cursor(self.queryset, RELEVANCE_ORDERING, cursor),
+            [0.375, self.pack.created_at, 42],
+        )
+
+    def test_rejects_tampered_cursor(self):
+        cursor = encode_cursor(CATALOG_ORDERING, self.pack)
+        payload, signature = cursor.rsplit(":", 1)
+        forged = signing.dumps(
+            {"o": list(CATALOG_ORDERING), "v": ["2099-01-01T00:00:00+00:00", 1]},
+            salt=CURSOR_SALT,
+        )
+        for tampered in (
+            cursor[:-1] + ("A" if cursor[-1] != "A" else "B"),
+            f"{payload}x:{signature}",
+            f"{forged.rsplit(':', 1)[0]}:{signature}",
+            "garbage",
+        ):
+            with self.subTest(cursor=tampered):
+                with self.assertRaises(ValueError):
+                    decode_cursor(self.queryset, CATALOG_ORDERING, tampered)
+
+    def test_rejects_cursor_signed_for_another_purpose(self):
+        cursor = signing.dumps({"o": list(CATALOG_ORDERING), "v": [None, 1]})
+        with self.assertRaises(ValueError):
+            decode_cursor(self.queryset, CATALOG_ORDERING, cursor)
+
+    def test_rejects_cursor_from_another_ordering(self):
+        self.pack.rank = 0.5
+        cursor = encode_cursor(RELEVANCE_ORDERING, self.pack)
+        with self.assertRaises(ValueError):
+            decode_cursor(self.queryset, CATALOG_ORDERING, cursor)
+
+    def test_rejects_invalid_values(self):
+        cursor = signing.dumps(
+            {"o": list(CATALOG_ORDERING), "v": ["not-a-date", 1]}, salt=CURSOR_SALT
+        )
+        with self.assertRaises(ValueError):
+            decode_cursor(self.queryset, CATALOG_ORDERING, cursor)
+
+
+class SearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = GameUser.objects.create(
+            nickname="author", username="author", email="author@example.com"
+        )
+        # 유사도가 float4로 딱 떨어지지 않는 값(0.6666667, 0.8333333)끼리 동점이 되도록
+        names = ["danso"] * 3 + ["dansoo typing"] * 4 + ["dansu", "dans typing"] * 4
+        for name in names:
+            SentencePack.objects.create(
+                name=name, author=author, sentences="a\r\nb", level="C"
+            )
+
+    async def test_pages_through_tied_ranks(self):
+        queryset, ordering = search_sentence_packs(keyword="danso")
+        expected = [
+            pack.id
+            async for pack in queryset.order_by(*[f"-{field}" for field in ordering])
+        ]
+        self.assertEqual(len(expected), 15)
+
+        seen = []
+        cursor = None
+        # 동점 경계에서 같은 페이지가 반복되면 끝나지 않으므로 횟수를 제한한다
+        for _ in range(len(expected)):
+            page = await paginate(queryset, ordering, cursor, page_size=2)
+            seen.extend(pack.id for pack in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+
+class BulkSubmitScoresTests(TransactionTestCase):
+    # abulk_submit_scores는 DB 전용 스레드의 다른 연결에서 커밋하므로
+    # 테스트 트랜잭션으로 감싸지 않는다
+    def setUp(self):
+        self.players = [
+            GameUser.objects.create(
+                nickname=f"player{i}", username=f"player{i}", email=f"p{i}@example.com"
+            )
+            for i in range(2)
+        ]
+        # save() 시그널은 커밋 후 캐시를 지우러 Redis에 가므로 bulk_create로 만든다
+        [self.pack] = SentencePack.objects.bulk_create(
+            [
+                SentencePack(
+                    name="pack", author=self.players[0], sentences="a", level="C"
+                )
+            ]
+        )
+        SentenceLeaderboard.objects.create(
+            sentence_pack=self.pack, player=self.players[1], score=500
+        )
+        patcher = mock.patch("sentence.scores.leaderboard_engine")
+        self.leaderboard = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_keeps_best_score_per_player(self):
+        first, second = self.players
+        updated = bulk_submit_scores(
+            [
+                (self.pack.id, first.id, 100),
+                (self.pack.id, first.id, 300),
+                (self.pack.id, first.id, 200),
+                (self.pack.id, second.id, 400),
+            ]
+        )
+        # 기존 최고 점수(500)보다 낮은 두 번째 플레이어는 갱신되지 않는다
+        self.assertEqual(updated, [(self.pack.id, first.id, 300)])
+        self.leaderboard.submit.assert_called_once_with(
+            self.pack.id, first.id, "player0", 300
+        )
+        self.assertEqual(
+            dict(SentenceLeaderboard.objects.values_list("player_id", "score")),
+            {first.id: 300, second.id: 500},
+        )
+        self.assertEqual(bulk_submit_scores([]), [])
+
+    async def test_runs_in_db_thread(self):
+        second = self.players[1]
+        updated = await abulk_submit_scores(iter([(self.pack.id, second.id, 600)]))
+        self.assertEqual(updated, [(self.pack.id, second.id, 600)])
+        self.leaderboard.submit.assert_called_once_with(
+            self.pack.id, second.id, "player1", 600
+        )
+
+
+class SentencePackSamplerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = GameUser.objects.create(
+            nickname="author", username="author", email="author@example.com"
+        )
+        cls.packs = [
+            SentencePack.objects.create(
+                name=f"pack{i}", author=author, sentences="a", level=level
+            )
+            for i, level in enumerate("AABC")
+        ]
+
+    async def test_loads_from_event_loop(self):
+        # 첫 호출에서 비동기 ORM으로 ID를 읽어야 이벤트 루프에서 실패하지 않는다
+        sampler = SentencePackSampler()
+        packs = await sampler.asample(10)
+        self.assertCountEqual(
+            [pack.id for pack in packs], [pack.id for pack in self.packs]
+        )
+        level_a = await sampler.asample_ids(10, "A")
+        self.assertCountEqual(level_a, [pack.id for pack in self.packs[:2]])
+        self.assertEqual(await sampler.asample_ids(10, "E"), [])
+
+
+class SentencePackListValidatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = GameUser.objects.create(
+            nickname="author", username="author", email="author@example.com"
+        )
+        cls.packs = [
+            SentencePack.objects.create(
+                name=f"pack{i}", author=author, sentences="a", level="C"
+            )
+            for i in range(3)
+        ]
+
+    async def test_list_uses_etag_only(self):
+        response = await self.async_client.get("/sentences/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+
+        response = await self.async_client.get(
+            "/sentences/", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # 가장 오래된 문장세트가 지워져도 남은 행의 updated_at은 그대로다
+        await SentencePack.objects.filter(id=self.packs[0].id).adelete()
+        response = await self.async_client.get(
+            "/sentences/",
+            headers={
+                "If-None-Match": etag,
+                "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(
+            "/sentences/",
+            headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class SubmitScoreInputTests(SimpleTestCase):
+    def test_parse_score(self):
+        self.assertEqual(parse_score("1200"), 1200)
+        for value in ("abc", "1.5", "", str(2**31)):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_score(value)
+
+    async def test_rejects_invalid_score(self):
+        user = GameUser(id=1, nickname="nick")
+        with mock.patch(
+            "sentence.views.login_code_to_user", mock.AsyncMock(return_value=user)
+        ):
+            for data in ({"score": "abc"}, {"score": str(2**40)}, {}):
+                with self.subTest(data=data):
+                    response = await self.async_client.post(
+                        "/sentences/1/set-score",
+                        data,
+                        headers={"X-Login-Code": "A123456"},
+                    )
+                    self.assertEqual(response.status_code, 400)
+
+
+class PageSizeTests(SimpleTestCase):
+    def test_page_size(self):
+        self.assertEqual(get_page_size(None), PAGE_SIZE)
+        self.assertEqual(get_page_size("5"), 5)
+        self.assertEqual(get_page_size(str(MAX_PAGE_SIZE + 1)), MAX_PAGE_SIZE)
+        for value in ("0", "-1", "abc"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    get_page_size(value)
@@ -1,52 +1,47 @@
-from typing import Callable, Coroutine, Any
-
-from asgiref.sync import sync_to_async
-from django.http import HttpRequest
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
 from adrf.decorators import api_view
 from rest_framework.response import Response
+from danso.db import run_in_db_thread
+from sentence.conditional import make_etag, not_modified, set_validators
+from sentence.leaderboard import leaderboard_engine
 from sentence.models import SentencePack, SentencePackLike
-from user.auth import login_code_to_user
+from sentence.pagination import get_page_size, paginate
+from sentence.sampler import sentence_pack_sampler
+from sentence.scores import parse_score, submit_score
+from sentence.search import CATALOG_ORDERING, search_sentence_packs
+from sentence.pack_cache import SentencePackCache
+from sentence.serializers import (
+    filter_liked_pack_ids,
+    get_liked_pack_ids,
+    serialize_sentence_packs,
+)
+from sentence.streaming import stream_sentence_packs
+from user.auth import login_code_to_user, optional_login_code_to_user
 from user.models import GameUser
 
 
 @api_view(["GET"])
 async def get_sentence_packs(request: HttpRequest):
-    get_sentences_all = sync_to_async(
-        lambda: list(SentencePack.objects.select_related("author").all())
+    return await paginated_sentence_packs(
+        request, SentencePack.objects.select_related("author"), CATALOG_ORDERING
     )
-    sentences = await get_sentences_all()
-    sentences_data = [
-        {
-            "id": sentence.id,
-            "name": sentence.name,
-            "author": sentence.author.nickname if sentence.author else "Unknown",
-            "original_author": sentence.original_author,
-            "total_likes": sentence.total_likes,
-            "is_liked": SentencePackLike.objects.filter(user=request.user, pack=sentence).exists()
-        }
-        for sentence in sentences
-    ]
-    return Response(sentences_data, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
 async def get_sentence_packs_random(request: HttpRequest):
-    get_sentences_random = sync_to_async(
-        lambda: list(SentencePack.objects.select_related("author").order_by("?")[:10])
-    )
-    sentences = await get_sentences_random()
-    sentences_data = [
-        {
-            "id": sentence.id,
-            "name": sentence.name,
-            "author": sentence.author.nickname if sentence.author else "Unknown",
-            "original_author": sentence.original_author,
-            "total_likes": sentence.total_likes,
-            "is_liked": SentencePackLike.objects.filter(user=request.user, pack=sentence).exists()
-        }
-        for sentence in sentences
-    ]
+    level = request.GET.get("level", None)
+    sentences = await sentence_pack_sampler.asample(10, level)
+    user = await optional_login_code_to_user(request)
+    sentences_data = await serialize_sentence_packs(sentences, user)
     return Response(sentences_data, status=status.HTTP_200_OK)
 
 
@@ -60,58 +55,75 @@ async def search_sentence_pack(request: HttpRequest):
             {"error": "검색어, 레벨 또는 저자를 제공해야 합니다."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    if keyword:
-        get_keyword_filter: Callable[..., Coroutine[Any, Any, list[SentencePack]]] = sync_to_async(
-            lambda: list(
-                SentencePack.objects.select_related("author").filter(
-                    name__icontains=keyword
-                )
-            )
-        )
-        sentences = await get_keyword_filter()
-    elif level:
-        get_level_filter: Callable[..., Coroutine[Any, Any, list[SentencePack]]] = sync_to_async(
-            lambda: list(
-                SentencePack.objects.select_related("author").filter(level=level)
-            )
-        )
-        sentences = await get_level_filter()
-    elif author:
-        get_author_filter: Callable[..., Coroutine[Any, Any, list[SentencePack]]] = sync_to_async(
-            lambda: list(
-                SentencePack.objects.select_related("author").filter(
-                    author__nickname__icontains=author
-                )
-            )
+    queryset, ordering = search_sentence_packs(
+        keyword=keyword, level=level, author=author
+    )
+    return await paginated_sentence_packs(request, queryset, ordering)
+
+
+async def paginated_sentence_packs(
+    request: HttpRequest, queryset: QuerySet, ordering: tuple[str, ...]
+) -> Response:
+    """
+    문장세트 목록을 키셋 페이지 단위로 응답
+
+    ?limit= 으로 페이지 크기를, 응답의 next_cursor를 ?cursor= 로 넘기면 다음
+    페이지를 받는다. 마지막 페이지의 next_cursor는 null이다.
+    """
+    try:
+        page_size = get_page_size(request.GET.get("limit", None))
+        page = await paginate(
+            queryset, ordering, request.GET.get("cursor", None), page_size
         )
-        sentences: list[SentencePack] = await get_author_filter()
-    return Response(
-        [
-            {
-                "id": sentence.id,
-                "name": sentence.name,
-                "author": sentence.author.nickname if sentence.author else "Unknown",
-                "original_author": sentence.original_author,
-                "level": sentence.level,
-                "total_likes": sentence.total_likes,
-                "is_liked": SentencePackLike.objects.filter(user=request.user, pack=sentence).exists()
-            }
-            for sentence in sentences
-        ],
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = await optional_login_code_to_user(request)
+    liked_pack_ids = await get_liked_pack_ids(user, page.items)
+    etag = make_etag(
+        "list",
+        [(pack.id, pack.content_version, pack.like_count) for pack in page.items],
+        page.next_cursor,
+        (user.id if user else None, sorted(liked_pack_ids)),
+    )
+    # 페이지의 max(updated_at)은 행이 삭제되거나 페이지에서 빠져도 바뀌지 않으므로
+    # 목록은 Last-Modified 없이 ETag로만 검증한다
+    response = not_modified(request, etag, None)
+    if response is not None:
+        return response
+
+    response = Response(
+        {
+            "results": await serialize_sentence_packs(page.items, user, liked_pack_ids),
+            "next_cursor": page.next_cursor,
+        },
         status=status.HTTP_200_OK,
     )
+    return set_validators(response, etag, None)
 
 
-async def get_leaderboard_data(sentence_pack: SentencePack):
-    get_all_leaderboards = sync_to_async(
-        lambda: list(
-            sentence_pack.leaderboards.all().select_related("player").order_by("-score")
-        )
+@require_GET
+async def export_sentence_packs(request: HttpRequest):
+    """문장세트 목록 전체를 페이지 없이 JSON 배열 스트림으로 내보냅니다. (keyword, level, author로 거를 수 있음)"""
+    try:
+        user = await optional_login_code_to_user(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"error": str(e.detail)}, status=e.status_code)
+
+    queryset, ordering = search_sentence_packs(
+        keyword=request.GET.get("keyword", None),
+        level=request.GET.get("level", None),
+        author=request.GET.get("author", None),
+    )
+    queryset = queryset.defer("sentences", "parsed_sentences").order_by(
+        *[f"-{field}" for field in ordering]
     )
-    all_leaderboards = await get_all_leaderboards()
-    top_5 = list(all_leaderboards[:5])
 
-    return top_5
+    response = StreamingHttpResponse(
+        stream_sentence_packs(queryset, user), content_type="application/json"
+    )
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @api_view(["GET"])
@@ -122,105 +134,84 @@ async def get_sentence_game(request: HttpRequest, sentence_id: int):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    try:
-        get_sentence_pack = sync_to_async(
-            lambda: SentencePack.objects.select_related("author").get(id=sentence_id)
-        )
-        sentence_pack = await get_sentence_pack()
-    except SentencePack.DoesNotExist:
+    # 자주 열리는 문장세트는 워커의 LRU에서 바로 꺼낸다 (DB 조회 없음)
+    sentence_pack = await SentencePackCache.aget(sentence_id)
+    if sentence_pack is None:
         return Response(
             {"error": "찾을 수 없는 문장 그룹입니다."}, status=status.HTTP_404_NOT_FOUND
         )
 
-    return Response(
+    user = await optional_login_code_to_user(request)
+    liked_pack_ids = await filter_liked_pack_ids(user, [sentence_pack["id"]])
+    etag = make_pack_etag("game", sentence_pack, user, liked_pack_ids)
+    last_modified = datetime.fromisoformat(sentence_pack["updated_at"])
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    parsed_sentences = sentence_pack["parsed_sentences"]
+    response = Response(
         {
-            "id": sentence_pack.id,
-            "name": sentence_pack.name,
-            "author": (
-                sentence_pack.author.nickname if sentence_pack.author else "알 수 없음"
-            ),
-            "original_author": sentence_pack.original_author,
-            "sentences": sentence_pack.sentences.split("\r\n"),
-            "total_likes": sentence_pack.total_likes,
-            "is_liked": SentencePackLike.objects.filter(user=request.user, pack=sentence_pack).exists()
+            "id": sentence_pack["id"],
+            "name": sentence_pack["name"],
+            "author": sentence_pack["author"] or "알 수 없음",
+            "original_author": sentence_pack["original_author"],
+            "sentences": parsed_sentences["texts"],
+            "sentence_lengths": parsed_sentences["lengths"],
+            "sentence_count": parsed_sentences["sentence_count"],
+            "total_characters": parsed_sentences["total_characters"],
+            "total_likes": sentence_pack["like_count"],
+            "is_liked": sentence_pack["id"] in liked_pack_ids,
         },
         status=status.HTTP_200_OK,
     )
-
-
-async def get_user_rank_data(sentence_pack: SentencePack, user):
-    get_leaderboard = sync_to_async(
-        lambda: sentence_pack.leaderboards.filter(player=user).first()
+    return set_validators(response, etag, last_modified)
+
+
+def make_pack_etag(
+    kind: str,
+    sentence_pack: dict,
+    user: Optional[GameUser],
+    liked_pack_ids: set[int],
+    *extra: Any,
+) -> str:
+    """
+    문장세트 응답의 ETag
+
+    공용 부분(내용 버전, 좋아요 수, extra)과 유저별 부분(유저 ID, 좋아요 여부)을
+    나눠 담는다.
+    """
+    pack_id = sentence_pack["id"]
+    return make_etag(
+        kind,
+        (pack_id, sentence_pack["content_version"], sentence_pack["like_count"]),
+        extra,
+        (user.id if user else None, pack_id in liked_pack_ids),
     )
 
-    get_all_ranks = sync_to_async(
-        lambda: list(
-            sentence_pack.leaderboards.order_by("-score").values_list(
-                "score", flat=True
-            )
-        )
-    )
-    get_top5_players = sync_to_async(
-        lambda: list(
-            sentence_pack.leaderboards.order_by("-score").values_list(
-                "player_id", flat=True
-            )[:5]
-        )
-    )
 
-    user_leaderboard = await get_leaderboard()
-    all_scores = await get_all_ranks()
-    top5_player_ids = await get_top5_players()
+def get_user_rank_data(summary: dict) -> dict:
+    """리더보드 요약에서 내 점수, 순위와 바로 위/아래 유저 정보 구성"""
+    top5_player_ids = {entry["player_id"] for entry in summary["top"]}
+    user_rank = summary["my_rank"]
 
-    if user_leaderboard:
-        user_score = user_leaderboard.score
-        user_rank = all_scores.index(user_score) + 1
-    else:
-        user_score = 0
-        user_rank = len(all_scores) + 1
-
-    get_nearby_users = sync_to_async(
-        lambda: list(
-            sentence_pack.leaderboards.select_related("player")
-            .order_by("-score")
-            .filter(score__gte=user_score)[:1]
-            .union(
-                sentence_pack.leaderboards.select_related("player")
-                .order_by("-score")
-                .filter(score__lte=user_score)[:1]
-            )
-        )
-    )
-
-    nearby_users = await get_nearby_users()
-
-    def is_in_top5(nearby_user):
-        return getattr(nearby_user, "player_id", None) in top5_player_ids
-
-    nearby_user_1 = {"player": "없음", "score": 0, "rank": user_rank - 1}
-
-    nearby_user_2 = {"player": "없음", "score": 0, "rank": user_rank + 1}
+    def nearby_user(entry, rank):
+        if entry is None or entry["player_id"] in top5_player_ids:
+            return {"player": "없음", "score": 0, "rank": rank}
+        return {
+            "player": entry["nickname"] or "없음",
+            "score": entry["score"],
+            "rank": rank,
+        }
 
-    if len(nearby_users) > 0 and nearby_users[0] and not is_in_top5(nearby_users[0]):
-        if getattr(nearby_users[0], "player", None):
-            nearby_user_1 = {
-                "player": nearby_users[0].player.nickname or "없음",
-                "score": nearby_users[0].score,
-                "rank": user_rank - 1,
-            }
-    if len(nearby_users) > 1 and nearby_users[1] and not is_in_top5(nearby_users[1]):
-        if getattr(nearby_users[1], "player", None):
-            nearby_user_2 = {
-                "player": nearby_users[1].player.nickname or "없음",
-                "score": nearby_users[1].score,
-                "rank": user_rank + 1,
-            }
+    above = summary["above"][-1] if summary["above"] else None
+    below = summary["below"][0] if summary["below"] else None
 
     return {
-        "my_score": user_score,
+        "my_score": summary["my_score"],
         "my_rank": user_rank,
-        "my_nearest_rank_user_1": nearby_user_1,
-        "my_nearest_rank_user_2": nearby_user_2,
+        "my_nearest_rank_user_1": nearby_user(above, user_rank - 1),
+        "my_nearest_rank_user_2": nearby_user(below, user_rank + 1),
     }
 
 
@@ -240,38 +231,39 @@ async def update_sentence_game_point(request: HttpRequest, sentence_pack_id: int
         )
     user = await login_code_to_user(login_code)
 
-    try:
-        get_sentence_pack = sync_to_async(
-            lambda: SentencePack.objects.select_related("author").get(
-                id=sentence_pack_id
-            )
-        )
-        sentence_pack = await get_sentence_pack()
-    except SentencePack.DoesNotExist:
-        return Response(
-            {"error": "찾을 수 없는 문장 그룹입니다."}, status=status.HTTP_404_NOT_FOUND
-        )
-
     score = request.POST.get("score", None)
     if score is None:
         return Response(
             {"error": "점수가 제공되지 않았습니다."},
             status=status.HTTP_400_BAD_REQUEST,
         )
+    try:
+        score = parse_score(score)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    leaderboard, created = await sync_to_async(
-        lambda: sentence_pack.leaderboards.get_or_create(player=user)
-    )()
+    # 문장세트가 없으면 외래키 제약으로 실패하므로 미리 조회하지 않는다
+    try:
+        is_new_best = await run_in_db_thread(
+            submit_score, sentence_pack_id, user, score
+        )
+    except IntegrityError:
+        # 문장세트가 없어서 실패한 경우만 404, 그 밖의 제약 위반은 그대로 올린다
+        if await SentencePack.objects.filter(id=sentence_pack_id).aexists():
+            raise
+        return Response(
+            {"error": "찾을 수 없는 문장 그룹입니다."}, status=status.HTTP_404_NOT_FOUND
+        )
 
-    new_score = int(score)
-    if created or leaderboard.score < new_score:
-        leaderboard.score = new_score
-        await sync_to_async(leaderboard.save)()
+    if is_new_best:
         message = "최고 점수가 업데이트되었습니다."
     else:
         message = "기존 최고 점수보다 낮아 업데이트되지 않았습니다."
 
-    return Response({"message": message}, status=status.HTTP_200_OK)
+    return Response(
+        {"message": message, "is_new_best": is_new_best}, status=status.HTTP_200_OK
+    )
+
 
 @api_view(["GET"])
 async def get_sentence_by_id(request: HttpRequest, sentence_id: int):
@@ -289,44 +281,50 @@ async def get_sentence_by_id(request: HttpRequest, sentence_id: int):
         )
     user = await login_code_to_user(login_code)
 
-    try:
-        get_sentence_pack = sync_to_async(
-            lambda: SentencePack.objects.select_related("author").get(id=sentence_id)
-        )
-        sentence_pack = await get_sentence_pack()
-    except SentencePack.DoesNotExist:
+    sentence_pack = await SentencePackCache.aget(sentence_id)
+    if sentence_pack is None:
         return Response(
             {"error": "찾을 수 없는 문장 그룹입니다."}, status=status.HTTP_404_NOT_FOUND
         )
 
-    leaderboards = await get_leaderboard_data(sentence_pack)
-    rank_data = await get_user_rank_data(sentence_pack, user)
+    # 순위는 리더보드 버전이 바뀔 때만 다시 계산한다
+    liked_pack_ids = await filter_liked_pack_ids(user, [sentence_pack["id"]])
+    leaderboard_version = await leaderboard_engine.aversion(sentence_pack["id"])
+    etag = make_pack_etag(
+        "detail", sentence_pack, user, liked_pack_ids, leaderboard_version
+    )
+    last_modified = max(
+        datetime.fromisoformat(sentence_pack["updated_at"]),
+        datetime.fromtimestamp(leaderboard_version / 1000, tz=dt_timezone.utc),
+    )
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
 
-    return Response(
+    summary = await leaderboard_engine.asummary(sentence_pack["id"], user.id)
+    rank_data = get_user_rank_data(summary)
+
+    response = Response(
         {
-            "id": sentence_pack.id,
-            "name": sentence_pack.name,
-            "author": (
-                sentence_pack.author.nickname if sentence_pack.author else "알 수 없음"
-            ),
-            "original_author": sentence_pack.original_author,
+            "id": sentence_pack["id"],
+            "name": sentence_pack["name"],
+            "author": sentence_pack["author"] or "알 수 없음",
+            "original_author": sentence_pack["original_author"],
             "leaderboard": [
                 {
-                    "player": (
-                        leaderboard.player.nickname
-                        if leaderboard.player
-                        else "알 수 없음"
-                    ),
-                    "score": leaderboard.score,
+                    "player": leaderboard["nickname"] or "알 수 없음",
+                    "score": leaderboard["score"],
                 }
-                for leaderboard in leaderboards
+                for leaderboard in summary["top"]
             ],
             **rank_data,
-            "total_likes": sentence_pack.total_likes,
-            "is_liked": SentencePackLike.objects.filter(user=request.user, pack=sentence_pack).exists()
+            "total_likes": sentence_pack["like_count"],
+            "is_liked": sentence_pack["id"] in liked_pack_ids,
         },
         status=status.HTTP_200_OK,
     )
+    return set_validators(response, etag, last_modified)
+
 
 @api_view(["POST"])
 async def interact_like_sentence_pack(request: HttpRequest, sentence_id: int):
@@ -345,23 +343,38 @@ async def interact_like_sentence_pack(request: HttpRequest, sentence_id: int):
     user = await login_code_to_user(login_code)
 
     try:
-        get_sentence_pack = sync_to_async(
-            lambda: SentencePack.objects.get(id=sentence_id)
-        )
-        sentence_pack = await get_sentence_pack()
+        sentence_pack = await SentencePack.objects.aget(id=sentence_id)
     except SentencePack.DoesNotExist:
         return Response(
             {"error": "찾을 수 없는 문장 그룹입니다."}, status=status.HTTP_404_NOT_FOUND
         )
 
-    like, created = await sync_to_async(
-        lambda: SentencePackLike.objects.get_or_create(user=user, pack=sentence_pack)
-    )()
+    created = await run_in_db_thread(toggle_sentence_pack_like, user, sentence_pack)
 
     if created:
         message = "문장 그룹에 좋아요를 추가했습니다."
     else:
-        await sync_to_async(like.delete)()
         message = "문장 그룹의 좋아요를 취소했습니다."
 
     return Response({"message": message}, status=status.HTTP_200_OK)
+
+
+def toggle_sentence_pack_like(user: GameUser, sentence_pack: SentencePack) -> bool:
+    """좋아요를 추가하거나 취소하고 like_count를 같은 트랜잭션에서 갱신"""
+    with transaction.atomic():
+        # 캐시된 좋아요 수를 커밋 후 비운다
+        transaction.on_commit(lambda: SentencePackCache.invalidate(sentence_pack.id))
+        like, created = SentencePackLike.objects.get_or_create(
+            user=user, pack=sentence_pack
+        )
+        packs = SentencePack.objects.filter(id=sentence_pack.id)
+        if created:
+            packs.update(like_count=F("like_count") + 1, updated_at=timezone.now())
+            return True
+
+        deleted, _ = like.delete()
+        if deleted:
+            packs.filter(like_count__gt=0).update(
+                like_count=F("like_count") - 1, updated_at=timezone.now()
+            )
+        return False
@@ -1,19 +1,37 @@
-from asgiref.sync import sync_to_async
-from django.http import HttpResponse, JsonResponse
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from rest_framework.exceptions import AuthenticationFailed
 
+from user.login_cache import LoginCodeCache
+from user.login_token import LoginToken
 from user.models import GameUser
 
 __all__ = [
     "login_code_to_user",
+    "optional_login_code_to_user",
 ]
 
 
 async def login_code_to_user(login_code: str) -> GameUser:
-    user_filter = sync_to_async(
-        lambda: list(GameUser.objects.filter(login_code=login_code))
-    )
-    users = await user_filter()
-    if len(users) == 0:
+    if settings.LOGIN_TOKEN_ENABLED and LoginToken.is_token(login_code):
+        return await LoginToken.verify(login_code)
+
+    user = await LoginCodeCache.get(login_code)
+    if user is not None:
+        return user
+
+    user = await GameUser.objects.filter(login_code=login_code).afirst()
+    if user is None:
         raise AuthenticationFailed("로그인이 필요합니다.")
-    return users[0]
+    await LoginCodeCache.set(user)
+    return user
+
+
+async def optional_login_code_to_user(request: HttpRequest) -> Optional[GameUser]:
+    """X-Login-Code 헤더가 없으면 None, 있으면 해당 유저 (잘못된 코드는 인증 실패)"""
+    login_code = request.headers.get("X-Login-Code", None)
+    if not login_code:
+        return None
+    return await login_code_to_user(login_code)
@@ -0,0 +1,124 @@
+import asyncio
+import re
+import time
+from typing import ClassVar, Optional
+
+import aiohttp
+import jwt
+from django.conf import settings
+
+from user.http_client import SharedHttpClient
+
+
+class GoogleIdToken:
+    """
+    Google id_token 로컬 검증
+
+    Google 공개키(JWKS)를 Cache-Control max-age 동안 프로세스에 캐시해 두고
+    PyJWT로 서명과 iss/aud/exp를 확인한다. 검증에 성공하면 userinfo API를
+    호출하지 않아도 이메일과 이름을 얻을 수 있다.
+    """
+
+    CERTS_URL: ClassVar[str] = "https://www.googleapis.com/oauth2/v3/certs"
+    ISSUERS: ClassVar[tuple[str, ...]] = (
+        "accounts.google.com",
+        "https://accounts.google.com",
+    )
+    LEEWAY: ClassVar[int] = 60
+    DEFAULT_CERTS_MAX_AGE: ClassVar[int] = 60 * 60
+    # 모르는 kid가 들어와도 이 간격 안에서는 공개키를 다시 받지 않는다
+    MIN_REFRESH_INTERVAL: ClassVar[int] = 60
+
+    _keys: ClassVar[dict[str, jwt.PyJWK]] = {}
+    _expires_at: ClassVar[float] = 0.0
+    _refreshed_at: ClassVar[float] = 0.0
+    _lock: ClassVar[Optional[asyncio.Lock]] = None
+    _lock_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if cls._lock is None or cls._lock_loop is not loop:
+            cls._lock = asyncio.Lock()
+            cls._lock_loop = loop
+        return cls._lock
+
+    @classmethod
+    async def _refresh_keys(cls) -> None:
+        async with SharedHttpClient.session() as session:
+            async with session.get(cls.CERTS_URL) as response:
+                if response.status != 200:
+                    raise ValueError(f"Failed to fetch Google certs: {response.status}")
+                certs = await response.json()
+                cache_control = response.headers.get("Cache-Control", "")
+
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        now = time.monotonic()
+        cls._keys = {
+            key["kid"]: jwt.PyJWK(key, algorithm="RS256")
+            for key in certs.get("keys", [])
+            if key.get("kty") == "RSA"
+        }
+        cls._expires_at = now + (
+            int(max_age.group(1)) if max_age else cls.DEFAULT_CERTS_MAX_AGE
+        )
+        cls._refreshed_at = now
+
+    @classmethod
+    async def _get_key(cls, kid: str) -> Optional[jwt.PyJWK]:
+        now = time.monotonic()
+        if kid in cls._keys and now < cls._expires_at:
+            return cls._keys[kid]
+
+        # 배포 직후 로그인이 몰려도 공개키는 한 번만 받는다
+        async with cls._get_lock():
+            now = time.monotonic()
+            expired = now >= cls._expires_at
+            unknown = kid not in cls._keys
+            if expired or (
+                unknown and now - cls._refreshed_at >= cls.MIN_REFRESH_INTERVAL
+            ):
+                await cls._refresh_keys()
+        return cls._keys.get(kid)
+
+    @classmethod
+    async def verify(cls, id_token: str) -> dict:
+        """
+        id_token 서명과 클레임 검증
+
+        Returns:
+            email, name 등이 담긴 클레임
+
+        Raises:
+            ValueError: 서명이나 클레임이 올바르지 않은 경우
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError:
+            raise ValueError("Malformed id_token")
+
+        if header.get("alg") != "RS256":
+            raise ValueError("Unsupported id_token algorithm")
+        try:
+            key = await cls._get_key(header.get("kid", ""))
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, jwt.PyJWTError):
+            # 공개키를 못 받으면 호출 측이 userinfo API로 돌아갈 수 있게 한다
+            raise ValueError("Failed to fetch Google certs")
+        if key is None:
+            raise ValueError("Unknown id_token signing key")
+
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=["RS256"],
+                audience=settings.GOOGLE_CLIENT_ID,
+                issuer=cls.ISSUERS,
+                leeway=cls.LEEWAY,
+                options={"require": ["iss", "aud", "exp", "iat"]},
+            )
+        except jwt.PyJWTError as e:
+            raise ValueError(f"Invalid id_token: {e}")
+        if not claims.get("email_verified", False):
+            raise ValueError("Unverified id_token email")
+        return claims
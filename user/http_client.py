@@ -0,0 +1,74 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, ClassVar, Optional
+
+import aiohttp
+
+
+class SharedHttpClient:
+    """
+    워커 전체에서 공유하는 aiohttp 세션
+
+    로그인마다 세션을 새로 만들면 TCP/TLS 연결을 매번 다시 맺어야 하므로,
+    ASGI lifespan 시작 시 세션 하나를 열어 keep-alive 연결을 재사용하고 종료 시
+    닫는다. 동시에 열 수 있는 연결 수를 제한해 로그인이 몰려도 외부 API로 나가는
+    연결이 폭증하지 않는다.
+    """
+
+    TIMEOUT: ClassVar[aiohttp.ClientTimeout] = aiohttp.ClientTimeout(
+        total=10, connect=3
+    )
+    MAX_CONNECTIONS: ClassVar[int] = 64
+    MAX_CONNECTIONS_PER_HOST: ClassVar[int] = 32
+    KEEPALIVE_TIMEOUT: ClassVar[float] = 60.0
+
+    _session: ClassVar[Optional[aiohttp.ClientSession]] = None
+    _loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+
+    @classmethod
+    def _create_session(cls) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=cls.MAX_CONNECTIONS,
+            limit_per_host=cls.MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=cls.TIMEOUT)
+
+    @classmethod
+    async def start(cls) -> None:
+        """ASGI lifespan 시작 시 호출"""
+        if cls._session is None or cls._session.closed:
+            cls._session = cls._create_session()
+            cls._loop = asyncio.get_running_loop()
+
+    @classmethod
+    async def close(cls) -> None:
+        """ASGI lifespan 종료 시 호출"""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._loop = None
+
+    @classmethod
+    @asynccontextmanager
+    async def session(cls) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        공유 세션 사용
+
+        공유 세션은 lifespan에서만 열고 닫는다. 세션은 만든 이벤트 루프에서만 쓸 수
+        있으므로, 여기서 처음 열면 요청별 루프(예: 개발 서버)에 묶인 채 닫히지 않고
+        남는다. lifespan이 없거나 다른 루프에서 호출되면 그 호출 동안만 쓰는 세션을
+        따로 열고 닫는다.
+        """
+        session = cls._session
+        if (
+            session is not None
+            and not session.closed
+            and cls._loop is asyncio.get_running_loop()
+        ):
+            yield session
+            return
+
+        async with cls._create_session() as session:
+            yield session
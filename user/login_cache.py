@@ -0,0 +1,121 @@
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, ClassVar, Hashable, Optional
+
+import redis.asyncio as aioredis
+
+from danso.redis_client import get_async_redis
+from user.models import GameUser
+
+
+class LocalTTLCache:
+    """크기 제한과 TTL이 있는 프로세스 내 LRU 캐시"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class LoginCodeCache:
+    """
+    로그인 코드 -> GameUser 조회 캐시
+
+    프로세스 내 LRU(짧은 TTL) -> Redis -> DB 순서로 조회한다.
+    로그인/로그아웃 시 invalidate로 명시적으로 지우고, 다른 워커의 LRU는
+    LOCAL_TTL이 지나면 자연스럽게 Redis에서 다시 읽는다.
+    """
+
+    KEY_PREFIX: ClassVar[str] = "login_code_user:"
+    REDIS_TTL: ClassVar[int] = 600
+    LOCAL_TTL: ClassVar[float] = 5.0
+    LOCAL_MAXSIZE: ClassVar[int] = 4096
+    FIELDS: ClassVar[tuple[str, ...]] = (
+        "id",
+        "nickname",
+        "username",
+        "email",
+        "login_code",
+    )
+
+    _local: ClassVar[LocalTTLCache] = LocalTTLCache(LOCAL_MAXSIZE, LOCAL_TTL)
+
+    @classmethod
+    def _redis(cls) -> aioredis.Redis:
+        return get_async_redis()
+
+    @classmethod
+    def _build_user(cls, data: dict) -> GameUser:
+        # 호출한 쪽에서 인스턴스를 수정해도 캐시가 오염되지 않도록 매번 새로 만든다
+        return GameUser.from_db("default", cls.FIELDS, [data[f] for f in cls.FIELDS])
+
+    @classmethod
+    async def get(cls, login_code: str) -> Optional[GameUser]:
+        """
+        캐시된 유저 조회
+
+        Args:
+            login_code: X-Login-Code 헤더 값
+
+        Returns:
+            캐시된 GameUser, 없으면 None
+        """
+        data = cls._local.get(login_code)
+        if data is None:
+            raw: Optional[bytes] = await cls._redis().get(
+                f"{cls.KEY_PREFIX}{login_code}"
+            )
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            cls._local.set(login_code, data)
+        return cls._build_user(data)
+
+    @classmethod
+    async def set(cls, user: GameUser) -> None:
+        """DB에서 조회한 유저를 두 캐시에 기록"""
+        if not user.login_code:
+            return
+        data = {field: getattr(user, field) for field in cls.FIELDS}
+        await cls._redis().setex(
+            f"{cls.KEY_PREFIX}{user.login_code}", cls.REDIS_TTL, json.dumps(data)
+        )
+        cls._local.set(user.login_code, data)
+
+    @classmethod
+    async def invalidate(cls, login_code: Optional[str]) -> None:
+        """로그인 코드가 바뀌거나 삭제될 때 호출"""
+        if not login_code:
+            return
+        await cls._redis().delete(f"{cls.KEY_PREFIX}{login_code}")
+        cls._local.pop(login_code)
@@ -0,0 +1,116 @@
+from typing import ClassVar, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+import redis.asyncio as aioredis
+from rest_framework.exceptions import AuthenticationFailed
+
+from danso.redis_client import get_async_redis
+from user.login_cache import LocalTTLCache
+from user.models import GameUser
+
+
+class LoginToken:
+    """
+    서명된 로그인 토큰
+
+    토큰에 유저 ID, 닉네임, 발급 시각을 담고 LOGIN_TOKEN_SECRET으로 HMAC
+    서명하므로 검증에 DB 조회가 필요 없다. 로그아웃은 유저별 토큰 버전을 올려 이전 토큰을
+    무효화하며, 버전은 DB에 저장하고 Redis와 프로세스 내 캐시로 조회한다.
+    """
+
+    SALT: ClassVar[str] = "user.login_token"
+    VERSION_PREFIX: ClassVar[str] = "login_token_version:"
+    VERSION_TTL: ClassVar[int] = 60 * 60 * 24
+    LOCAL_TTL: ClassVar[float] = 5.0
+    LOCAL_MAXSIZE: ClassVar[int] = 4096
+
+    _versions: ClassVar[LocalTTLCache] = LocalTTLCache(LOCAL_MAXSIZE, LOCAL_TTL)
+
+    @classmethod
+    def _redis(cls) -> aioredis.Redis:
+        return get_async_redis()
+
+    @staticmethod
+    def is_token(login_code: str) -> bool:
+        """기존 7자리 로그인 코드와 서명된 토큰 구분"""
+        return ":" in login_code
+
+    @classmethod
+    def issue(cls, user: GameUser) -> str:
+        """
+        유저에게 새 로그인 토큰 발급
+
+        Args:
+            user: token_version이 최신으로 조회된 GameUser
+
+        Returns:
+            서명된 로그인 토큰
+        """
+        return signing.dumps(
+            {"id": user.id, "n": user.nickname, "v": user.token_version},
+            key=settings.LOGIN_TOKEN_SECRET,
+            salt=cls.SALT,
+        )
+
+    @classmethod
+    async def verify(cls, token: str) -> GameUser:
+        """
+        토큰을 검증하고 가벼운 GameUser를 반환
+
+        반환되는 GameUser에는 id와 nickname만 채워져 있고 나머지 필드는
+        지연 로딩된다.
+
+        Raises:
+            AuthenticationFailed: 서명이 잘못되었거나 만료 또는 폐기된 토큰
+        """
+        try:
+            payload = signing.loads(
+                token,
+                key=settings.LOGIN_TOKEN_SECRET,
+                salt=cls.SALT,
+                max_age=settings.LOGIN_TOKEN_MAX_AGE,
+            )
+        except signing.BadSignature:
+            raise AuthenticationFailed("로그인이 필요합니다.")
+
+        if payload["v"] != await cls.current_version(payload["id"]):
+            raise AuthenticationFailed("로그인이 필요합니다.")
+
+        return GameUser.from_db(
+            "default", ("id", "nickname"), (payload["id"], payload["n"])
+        )
+
+    @classmethod
+    async def current_version(cls, user_id: int) -> Optional[int]:
+        version = cls._versions.get(user_id)
+        if version is not None:
+            return version
+
+        raw: Optional[bytes] = await cls._redis().get(f"{cls.VERSION_PREFIX}{user_id}")
+        if raw is not None:
+            version = int(raw)
+        else:
+            version = (
+                await GameUser.objects.filter(id=user_id)
+                .values_list("token_version", flat=True)
+                .afirst()
+            )
+            if version is None:
+                return None
+            await cls._redis().setex(
+                f"{cls.VERSION_PREFIX}{user_id}", cls.VERSION_TTL, version
+            )
+
+        cls._versions.set(user_id, version)
+        return version
+
+    @classmethod
+    async def revoke(cls, user_id: int) -> None:
+        """유저에게 발급된 모든 토큰 무효화"""
+        await GameUser.objects.filter(id=user_id).aupdate(
+            token_version=F("token_version") + 1
+        )
+        await cls._redis().delete(f"{cls.VERSION_PREFIX}{user_id}")
+        cls._versions.pop(user_id)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_alter_gameuser_nickname"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="gameuser",
+            name="login_code",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=255, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0005_alter_gameuser_login_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gameuser",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:10
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0006_gameuser_token_version"),
+        # pg_trgm 확장 설치
+        ("sentence", "0008_sentencepack_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="gameuser",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("nickname"),
+                    name="gin_trgm_ops",
+                ),
+                name="gameuser_nickname_trgm",
+            ),
+        ),
+    ]
@@ -1,7 +1,9 @@
 import string
 import random
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 
 class GameUser(models.Model):
@@ -9,7 +11,18 @@ class GameUser(models.Model):
     nickname = models.CharField(max_length=150)
     username = models.CharField(max_length=150, unique=True)
     email = models.EmailField(unique=True)
-    login_code = models.CharField(max_length=255, blank=True, null=True)
+    login_code = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+    # 로그아웃 시 증가시켜 이전에 발급한 로그인 토큰을 무효화
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # 저자 닉네임 검색용 pg_trgm 인덱스
+        indexes = [
+            GinIndex(
+                OpClass(Upper("nickname"), name="gin_trgm_ops"),
+                name="gameuser_nickname_trgm",
+            ),
+        ]
 
     def __str__(self):
         return f"GameUser(id={self.id}, nickname={self.nickname}, username={self.username})"
@@ -1,3 +1,182 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
 
-# Create your tests here.
+import aiohttp
+import fakeredis
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from user.google_id_token import GoogleIdToken
+from user.http_client import SharedHttpClient
+from user.login_token import LoginToken
+from user.models import GameUser
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+@override_settings(GOOGLE_CLIENT_ID=CLIENT_ID)
+class GoogleIdTokenTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def setUp(self):
+        # 실제 JWKS 대신 테스트 키를 캐시에 넣어 둔다
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(
+            self.private_key.public_key(), as_dict=True
+        )
+        GoogleIdToken._keys = {"kid-1": jwt.PyJWK(jwk, algorithm="RS256")}
+        GoogleIdToken._expires_at = time.monotonic() + 3600
+        GoogleIdToken._refreshed_at = time.monotonic()
+
+    def tearDown(self):
+        GoogleIdToken._keys = {}
+        GoogleIdToken._expires_at = 0.0
+        GoogleIdToken._refreshed_at = 0.0
+
+    def sign(self, key=None, kid="kid-1", **overrides) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": CLIENT_ID,
+            "iat": now,
+            "exp": now + 3600,
+            "email": "user@example.com",
+            "email_verified": True,
+            "name": "User",
+        }
+        claims.update(overrides)
+        return jwt.encode(
+            claims,
+            key or self.private_key,
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+
+    async def test_valid_token(self):
+        claims = await GoogleIdToken.verify(self.sign())
+        self.assertEqual(claims["email"], "user@example.com")
+
+    async def test_tampered_signature(self):
+        token = self.sign(key=self.other_key)
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(token)
+
+    async def test_tampered_payload(self):
+        header, _, signature = self.sign().split(".")
+        payload = self.sign(email="attacker@example.com").split(".")[1]
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(f"{header}.{payload}.{signature}")
+
+    async def test_wrong_audience(self):
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(self.sign(aud="other-client"))
+
+    async def test_wrong_issuer(self):
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(self.sign(iss="https://evil.example.com"))
+
+    async def test_expired(self):
+        past = int(time.time()) - 2 * 3600
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(self.sign(iat=past, exp=past + 60))
+
+    async def test_unverified_email(self):
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(self.sign(email_verified=False))
+
+    async def test_malformed(self):
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify("not-a-jwt")
+
+    async def test_unsupported_algorithm(self):
+        token = jwt.encode(
+            {"aud": CLIENT_ID}, "s" * 32, algorithm="HS256", headers={"kid": "kid-1"}
+        )
+        with self.assertRaises(ValueError):
+            await GoogleIdToken.verify(token)
+
+    async def test_certs_fetch_failure_is_value_error(self):
+        # 공개키를 못 받아도 ValueError로 바뀌어야 userinfo API로 돌아갈 수 있다
+        GoogleIdToken._expires_at = 0.0
+        for error in (
+            aiohttp.ClientError(),
+            asyncio.TimeoutError(),
+            KeyError("kid"),
+        ):
+            with self.subTest(error=type(error).__name__):
+                with mock.patch.object(
+                    GoogleIdToken, "_refresh_keys", side_effect=error
+                ):
+                    with self.assertRaises(ValueError):
+                        await GoogleIdToken.verify(self.sign())
+
+
+class SharedHttpClientTests(SimpleTestCase):
+    def tearDown(self):
+        SharedHttpClient._session = None
+        SharedHttpClient._loop = None
+
+    @staticmethod
+    async def use_session() -> aiohttp.ClientSession:
+        async with SharedHttpClient.session() as session:
+            return session
+
+    def test_without_lifespan_closes_session(self):
+        # lifespan 없이 쓰면 공유 세션을 만들지 않고 쓸 때마다 닫는다
+        session = asyncio.run(self.use_session())
+        self.assertTrue(session.closed)
+        self.assertIsNone(SharedHttpClient._session)
+
+    def test_shared_only_on_lifespan_loop(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(SharedHttpClient.start())
+            shared = SharedHttpClient._session
+            self.assertIs(loop.run_until_complete(self.use_session()), shared)
+            self.assertFalse(shared.closed)
+
+            # 다른 루프에서는 공유 세션을 쓰지 않는다
+            other = asyncio.run(self.use_session())
+            self.assertIsNot(other, shared)
+            self.assertTrue(other.closed)
+            self.assertFalse(shared.closed)
+        finally:
+            loop.run_until_complete(SharedHttpClient.close())
+            loop.close()
+        self.assertTrue(shared.closed)
+
+
+@override_settings(
+    LOGIN_TOKEN_ENABLED=True, LOGIN_TOKEN_SECRET="test-login-token-secret"
+)
+class UserInfoTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        patcher = mock.patch.object(LoginToken, "_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(LoginToken._versions.clear)
+
+    async def test_token_principal(self):
+        # 토큰으로 인증된 유저는 id/닉네임 외의 필드가 지연되어 있다
+        user = await GameUser.objects.acreate(
+            nickname="nick", username="user", email="user@example.com"
+        )
+        response = await self.async_client.get(
+            "/user/me", headers={"X-Login-Code": LoginToken.issue(user)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "id": user.id,
+                "nickname": "nick",
+                "username": "user",
+                "email": "user@example.com",
+            },
+        )
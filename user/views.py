@@ -1,6 +1,5 @@
-import random, string, aiohttp
+import random, string
 from urllib.parse import urlencode
-from asgiref.sync import sync_to_async
 
 from django.http import HttpRequest, JsonResponse, HttpResponse
 from django.shortcuts import redirect, render
@@ -8,6 +7,10 @@ from adrf.decorators import api_view
 
 from danso import settings
 from user.auth import login_code_to_user
+from user.google_id_token import GoogleIdToken
+from user.http_client import SharedHttpClient
+from user.login_cache import LoginCodeCache
+from user.login_token import LoginToken
 from user.models import GameUser
 
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
@@ -22,7 +25,7 @@ def generate_login_code():
 
 
 async def exchange_code_for_token(code: str) -> dict:
-    async with aiohttp.ClientSession() as session:
+    async with SharedHttpClient.session() as session:
         data = {
             "code": code,
             "client_id": settings.GOOGLE_CLIENT_ID,
@@ -31,20 +34,27 @@ async def exchange_code_for_token(code: str) -> dict:
             "grant_type": "authorization_code",
         }
         async with session.post(GOOGLE_TOKEN_URL, data=data) as response:
-            if response.status == 200:
-                token_data = await response.json()
-                access_token = token_data.get("access_token")
-                if not access_token:
-                    raise Exception("Access token not found in response")
-                user_data = await get_oauth_user_data(access_token)
-                return user_data
-            raise Exception(
-                f"Failed to exchange code for token: {response.status} {response.reason}"
-            )
+            if response.status != 200:
+                raise Exception(
+                    f"Failed to exchange code for token: {response.status} {response.reason}"
+                )
+            token_data = await response.json()
+
+    access_token = token_data.get("access_token")
+    if not access_token:
+        raise Exception("Access token not found in response")
+    id_token = token_data.get("id_token")
+    if settings.GOOGLE_ID_TOKEN_VERIFY_LOCALLY and id_token:
+        # 서명이 확인되면 userinfo API 왕복 없이 id_token의 이메일/이름을 사용
+        try:
+            return await GoogleIdToken.verify(id_token)
+        except ValueError:
+            pass
+    return await get_oauth_user_data(access_token)
 
 
 async def get_oauth_user_data(access_token: str) -> dict:
-    async with aiohttp.ClientSession() as session:
+    async with SharedHttpClient.session() as session:
         headers = {"Authorization": f"Bearer {access_token}"}
         async with session.get(GOOGLE_USERINFO_URL, headers=headers) as response:
             if response.status == 200:
@@ -61,7 +71,7 @@ async def login_oauth_url(request: HttpRequest):
         "client_id": settings.GOOGLE_CLIENT_ID,
         "redirect_uri": settings.GOOGLE_REDIRECT_URI,
         "response_type": "code",
-        "scope": "email profile",
+        "scope": "openid email profile",
         "access_type": "offline",
         "prompt": "consent",
     }
@@ -79,6 +89,11 @@ async def user_info(request: HttpRequest):
     if isinstance(user, HttpResponse):
         return user
 
+    # 로그인 토큰으로 인증된 유저는 id와 닉네임만 가지고 있다.
+    # 인자 없는 refresh_from_db는 지연된 필드를 그대로 두므로 필요한 필드를 지정한다
+    if user.get_deferred_fields():
+        await user.arefresh_from_db(fields=["username", "email"])
+
     user_data = {
         "id": user.id,
         "nickname": user.nickname,
@@ -98,10 +113,10 @@ async def user_logout(request: HttpRequest):
     if isinstance(user, HttpResponse):
         return user
 
-    update_user = sync_to_async(
-        lambda: GameUser.objects.filter(id=user.id).update(login_code=None)
-    )
-    await update_user()
+    await GameUser.objects.filter(id=user.id).aupdate(login_code=None)
+    await LoginCodeCache.invalidate(login_code)
+    if settings.LOGIN_TOKEN_ENABLED:
+        await LoginToken.revoke(user.id)
     return JsonResponse({"message": "Logout successful"})
 
 
@@ -125,24 +140,19 @@ async def login_oauth_callback(request: HttpRequest):
     if not user_email:
         return JsonResponse({"error": "Google Oauth request failed"}, status=400)
     login_code = generate_login_code()
-    user_filter = sync_to_async(lambda: list(GameUser.objects.filter(email=user_email)))
-    users = await user_filter()
-    if len(users) == 0:
-        create_user = sync_to_async(
-            lambda: GameUser.objects.create(
-                nickname=user_data.get("name"),
-                username=user_data.get("email").split("@")[0],
-                email=user_email,
-                login_code=login_code,
-            )
+    user = await GameUser.objects.filter(email=user_email).afirst()
+    if user is None:
+        user = await GameUser.objects.acreate(
+            nickname=user_data.get("name"),
+            username=user_data.get("email").split("@")[0],
+            email=user_email,
+            login_code=login_code,
         )
-        user = await create_user()
     else:
-        user = users[0]
-        update_user = sync_to_async(
-            lambda: GameUser.objects.filter(id=user.id).update(login_code=login_code)
-        )
-        await update_user()
-        get_updated_user = sync_to_async(lambda: GameUser.objects.get(id=user.id))
-        user = await get_updated_user()
-    return redirect(f"/login/result?login_code={login_code}")
+        # 이전 로그인 코드로 캐시된 유저 정보 제거
+        await LoginCodeCache.invalidate(user.login_code)
+        await GameUser.objects.filter(id=user.id).aupdate(login_code=login_code)
+        user = await GameUser.objects.aget(id=user.id)
+    if settings.LOGIN_TOKEN_ENABLED:
+        login_code = LoginToken.issue(user)
+    return redirect(f"/login/result?{urlencode({'login_code': login_code})}")